@@ -0,0 +1,62 @@
+# ==============================================================================
+# 文件名: admin_routes.py
+# 功能: 运维管理蓝图
+# 描述:
+#   1. 慢查询日志查看/清空（需开启 SLOW_QUERY_THRESHOLD_MS）
+#   只允许默认店铺中 ADMIN_ACCOUNTS 配置的账号访问；慢查询记录跨店铺，
+#   包含 SQL 参数，不能开放给各店铺的普通账号
+# ==============================================================================
+
+from flask import Blueprint, request, g, current_app
+from slow_queries import get_slow_query_log
+from utils import success, error
+
+admin_bp = Blueprint('admin', __name__)
+
+SLOW_QUERY_SORTS = ('max_ms', 'total_ms', 'count', 'last_ms')
+
+
+# 管理员校验，通过时返回 None，否则返回错误响应
+def check_admin():
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+    user = g.current_user
+    if user.shop_id != current_app.config['DEFAULT_SHOP_ID'] or user.account not in current_app.config['ADMIN_ACCOUNTS']:
+        return error('无权限访问', 403)
+    return None
+
+
+# 慢查询列表
+"""
+按 sort（max_ms/total_ms/count/last_ms，默认 max_ms）倒序，返回前 limit 条（默认 50，最多 200）
+每条包含语句形状、次数、总/平均/最大耗时、最近一次的参数和调用接口、执行计划
+"""
+@admin_bp.route('/api/admin/slow-queries', methods = ['GET'])
+def slow_queries():
+    denied = check_admin()
+    if denied:
+        return denied
+    log = get_slow_query_log()
+    if log is None:
+        return error('慢查询日志未开启，请配置 SLOW_QUERY_THRESHOLD_MS', 404)
+    sort = request.args.get('sort', 'max_ms')
+    if sort not in SLOW_QUERY_SORTS:
+        return error(f"sort 仅支持 {'/'.join(SLOW_QUERY_SORTS)}", 400)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    return success({
+        'threshold_ms': log.threshold_ms,
+        'queries': log.snapshot(sort, limit)
+    })
+
+
+# 清空慢查询记录，用于优化后重新观察
+@admin_bp.route('/api/admin/slow-queries', methods = ['DELETE'])
+def clear_slow_queries():
+    denied = check_admin()
+    if denied:
+        return denied
+    log = get_slow_query_log()
+    if log is None:
+        return error('慢查询日志未开启，请配置 SLOW_QUERY_THRESHOLD_MS', 404)
+    log.clear()
+    return success(message='已清空')
@@ -0,0 +1,222 @@
+# ==============================================================================
+# 文件名: audit.py
+# 功能: 果蔬数据审计日志（异步批量写入）
+# 描述:
+#   1. SQLAlchemy 会话事件 after_flush 中收集 FruitVariety / Details 的增删改前后差异，
+#      暂存在 session.info；after_commit 时才放入内存队列，回滚则丢弃
+#   2. 批量/快速路径（Core UPDATE/DELETE）不经过 ORM 事件，调用 record_change 手动登记
+#   3. 后台线程从队列中按批取出，一次 executemany 写入 audit_logs，不占用业务事务
+#   4. 队列有上限，写满时丢弃并计数，保证内存有界；进程退出时 drain 剩余日志
+# 配置:
+#   AUDIT_ENABLED         是否开启，默认 True
+#   AUDIT_QUEUE_SIZE      队列上限，默认 10000
+#   AUDIT_BATCH_SIZE      每批写入条数，默认 500
+#   AUDIT_FLUSH_INTERVAL  最长等待秒数，默认 1.0
+# ==============================================================================
+
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import event, insert, inspect
+from datetime import datetime
+import atexit
+import json
+import os
+import queue
+import threading
+from models import db, FruitVariety, Details, AuditLog
+from tenancy import current_shop_id
+
+AUDITED_MODELS = (FruitVariety, Details)
+IGNORED_FIELDS = ('version', 'shop_id')   # 版本号每次都会变化，店铺单独成列，不记录
+
+_listeners_registered = False
+
+
+class AuditWriter:
+    def __init__(self, app, max_size:int, batch_size:int, flush_interval:float):
+        self.app = app
+        self.queue = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    # 后台线程在第一次写入时启动；fork 出的子进程里线程不存在，需要重新启动
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def put_many(self, entries:list):
+        if not entries:
+            return
+        self._ensure_started()
+        for entry in entries:
+            try:
+                self.queue.put_nowait(entry)
+            except queue.Full:
+                self.dropped += 1
+                if self.dropped % 1000 == 1:
+                    print(f"[Warning] 审计队列已满，已丢弃 {self.dropped} 条日志")
+
+    def _take_batch(self, timeout:float)->list:
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=timeout))
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch:list):
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(insert(AuditLog.__table__), batch)
+        except Exception as e:
+            print(f"[Error] 审计日志写入失败，丢弃 {len(batch)} 条: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take_batch(self.flush_interval)
+            if batch:
+                self._write(batch)
+
+    # 停止后台线程并把队列中剩余的日志全部写完
+    def stop(self, timeout:float = 5.0):
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        while True:
+            batch = self._take_batch(0)
+            if not batch:
+                break
+            self._write(batch)
+
+
+def init_audit(app):
+    app.config.setdefault('AUDIT_ENABLED', True)
+    app.config.setdefault('AUDIT_QUEUE_SIZE', 10000)
+    app.config.setdefault('AUDIT_BATCH_SIZE', 500)
+    app.config.setdefault('AUDIT_FLUSH_INTERVAL', 1.0)
+    if not app.config['AUDIT_ENABLED']:
+        return
+    writer = AuditWriter(
+        app,
+        max_size=app.config['AUDIT_QUEUE_SIZE'],
+        batch_size=app.config['AUDIT_BATCH_SIZE'],
+        flush_interval=app.config['AUDIT_FLUSH_INTERVAL']
+    )
+    app.extensions['audit'] = writer
+    atexit.register(writer.stop)   # 进程退出前写完剩余日志
+
+    global _listeners_registered
+    if not _listeners_registered:
+        event.listen(db.session, 'after_flush', _collect_changes)
+        event.listen(db.session, 'after_commit', _enqueue_pending)
+        event.listen(db.session, 'after_soft_rollback', _discard_pending)
+        _listeners_registered = True
+
+
+def _current_user_id():
+    if has_request_context():
+        user = g.get('current_user')
+        return user.id if user is not None else None
+    return None
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _entry(shop_id:int, table_name:str, row_id:int, action:str, before, after)->dict:
+    return {
+        'shop_id': shop_id,
+        'table_name': table_name,
+        'row_id': row_id,
+        'action': action,
+        'user_id': _current_user_id(),
+        'changes': json.dumps({'before': before, 'after': after}, ensure_ascii=False, default=str),
+        'created_at': datetime.utcnow()
+    }
+
+
+def _column_values(obj)->dict:
+    state = inspect(obj)
+    return {
+        attr.key: _serialize(getattr(obj, attr.key))
+        for attr in state.mapper.column_attrs
+        if attr.key not in IGNORED_FIELDS and attr.key in state.dict
+    }
+
+
+# after_flush：此时主键已生成，属性历史尚未重置，可以拿到修改前后的值
+def _collect_changes(session, flush_context):
+    pending = session.info.setdefault('audit_pending', [])
+    for obj in session.new:
+        if isinstance(obj, AUDITED_MODELS):
+            pending.append(_entry(obj.shop_id, obj.__tablename__, obj.id, 'insert', None, _column_values(obj)))
+    for obj in session.dirty:
+        if not isinstance(obj, AUDITED_MODELS) or not session.is_modified(obj, include_collections=False):
+            continue
+        state = inspect(obj)
+        before, after = {}, {}
+        for attr in state.mapper.column_attrs:
+            if attr.key in IGNORED_FIELDS:
+                continue
+            history = state.attrs[attr.key].history
+            if history.has_changes():
+                before[attr.key] = _serialize(history.deleted[0]) if history.deleted else None
+                after[attr.key] = _serialize(history.added[0]) if history.added else None
+        if after:
+            pending.append(_entry(obj.shop_id, obj.__tablename__, obj.id, 'update', before, after))
+    for obj in session.deleted:
+        if isinstance(obj, AUDITED_MODELS):
+            pending.append(_entry(obj.shop_id, obj.__tablename__, obj.id, 'delete', _column_values(obj), None))
+
+
+def _enqueue_pending(session):
+    pending = session.info.pop('audit_pending', None)
+    if pending and has_app_context():
+        writer = current_app.extensions.get('audit')
+        if writer is not None:
+            writer.put_many(pending)
+
+
+def _discard_pending(session, previous_transaction):
+    session.info.pop('audit_pending', None)
+
+
+# Core 查询结果行转成审计用的字典，字段与 ORM 路径记录的一致
+def row_values(row)->dict:
+    return {k: _serialize(v) for k, v in row._mapping.items() if k not in IGNORED_FIELDS}
+
+
+# 手动登记一条审计记录
+"""
+用于不经过 ORM 单元事务的 Core INSERT/UPDATE/DELETE（快速路径、批量接口）
+记录格式与 ORM 监听器相同：按实际的表和行 id 登记，before/after 为该行的平铺字段，
+调用方在修改前查出旧值作为 before；随当前事务提交后入队，回滚则丢弃
+"""
+def record_change(table_name:str, row_id:int, action:str, after:dict = None, before:dict = None):
+    db.session.info.setdefault('audit_pending', []).append(
+        _entry(current_shop_id(), table_name, row_id, action, before, after)
+    )
+
+
+# Core UPDATE 的审计：old 为修改前的行（row_values 的结果），只记录值确实变化的字段
+def record_update(table_name:str, old:dict, values:dict):
+    before = {k: old[k] for k in values if old[k] != values[k]}
+    if before:
+        record_change(table_name, old['id'], 'update', {k: _serialize(values[k]) for k in before}, before)
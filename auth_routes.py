@@ -0,0 +1,340 @@
+# ==============================================================================
+# 文件名: auth_routes.py
+# 功能: 用户认证蓝图
+# 描述:
+#   1. 全局 Token 校验钩子（before_app_request）
+#   2. 登录、注册、登出
+#   3. 注销账号、修改密码（支持密码或短信验证）
+#   账号和会话都属于店铺（g.shop_id）：同一手机号可在不同店铺分别注册，
+#   会话 key 带店铺，一个店铺的 Token 在其他店铺无效
+# ==============================================================================
+
+from flask import Blueprint, request, g, current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from werkzeug.security import generate_password_hash, check_password_hash   # 密码加密和安全
+import secrets
+from extensions import login_manager, get_redis
+from models import db, Users
+from sms import verify_sms_code
+from login_guard import check_login_allowed, record_login_failure, record_login_success, dummy_password_hash
+from utils import success, error, validate_password, get_request_token
+
+auth_bp = Blueprint('auth', __name__)
+
+# 把函数 load_user 注册为 Flask-Login 的“用户加载回调函数”.每当 Flask-Login 需要 从 Session 中恢复用户身份 时，就会自动调用这个函数
+@login_manager.user_loader
+def load_user(user_id):
+    return db.session.get(Users, int(user_id))
+
+
+# 全局钩子，用于在每一次请求的时候验证token
+@auth_bp.before_app_request
+def check_auth_token():
+    # 跳过公开接口和登录注册等接口
+    if request.path in ['/api/login', '/api/register']:
+        return None
+    # 果蔬列表、搜索和变更流只有 GET 是公开的，POST /api/fruits 仍需登录
+    if request.method == 'GET' and request.path in ['/api/fruits', '/api/search', '/api/fruits/changes']:
+        return None
+    token = get_request_token()
+
+    if not token:   
+     return error('无认证', 401)    
+
+    # Redis 不可用期间签发的签名 Token，不依赖 Redis 校验
+    if token.startswith(SIGNED_TOKEN_PREFIX):
+        user = load_signed_token(token)
+        if not user:
+            return error('认证解析失败', 401)
+        g.current_user = user
+        return None
+
+    redis_client = get_redis()
+    if redis_client is None:
+        return error('会话服务暂不可用，请重新登录', 503)
+    redis_key = session_key(token)
+    try:
+        # 在redis中查找对应内容，得到对应的唯一id
+        user_id_str = redis_client.get(redis_key)
+    except Exception as e:
+        print(f"[Error] Redis 读取失败: {e}")
+        return error('会话服务暂不可用，请重新登录', 503)
+    
+    try:
+        user_id = int(user_id_str)
+        user = Users.query.get(user_id)
+        if not user or user.shop_id != g.shop_id:
+            # 数据库中没有该用户（可能被删除），清理 Redis
+            redis_client.delete(redis_key)
+            return error('用户不存在', 401)
+        
+        # 将当前用户挂载到 flask.g 对象，供后续路由使用
+        g.current_user = user
+    except Exception as e:
+        return error('认证解析失败', 401)
+
+    return None
+
+
+# 会话在 Redis 中的 key，按店铺隔离
+def session_key(token:str)->str:
+    return f"session:{g.shop_id}:{token}"
+
+
+# 降级会话：Redis 不可用时签发带签名和过期时间的 Token
+"""
+Token 内容为用户 ID、店铺 ID 和密码哈希的末 8 位，修改密码后旧 Token 立即失效
+有效期较短（FALLBACK_SESSION_TTL），且无法通过登出撤销，只在 Redis 故障期间使用
+"""
+SIGNED_TOKEN_PREFIX = 's.'
+
+def _token_serializer():
+    if not current_app.secret_key:
+        return None
+    return URLSafeTimedSerializer(current_app.secret_key, salt='fallback-session')
+
+def issue_signed_token(user:Users):
+    serializer = _token_serializer()
+    if serializer is None:
+        return None
+    return SIGNED_TOKEN_PREFIX + serializer.dumps({'uid': user.id, 'shop': user.shop_id, 'pw': user.password[-8:]})
+
+def load_signed_token(token:str):
+    serializer = _token_serializer()
+    if serializer is None:
+        return None
+    try:
+        payload = serializer.loads(token[len(SIGNED_TOKEN_PREFIX):], max_age=current_app.config['FALLBACK_SESSION_TTL'])
+    except BadSignature:   # 包含过期（SignatureExpired）
+        return None
+    if payload.get('shop') != g.shop_id:
+        return None
+    user = db.session.get(Users, payload.get('uid'))
+    if not user or user.shop_id != g.shop_id or user.password[-8:] != payload.get('pw'):
+        return None
+    return user
+
+
+# 删除 Redis 中的会话；签名 Token 无法撤销，只能等待自然过期
+def revoke_session(token):
+    redis_client = get_redis()
+    if not token or token.startswith(SIGNED_TOKEN_PREFIX) or redis_client is None:
+        return
+    try:
+        redis_client.delete(session_key(token))
+    except Exception as e:
+        print(f"[Warning] 删除 Token 失败: {e}")
+
+
+# 登录功能
+"""
+先查 Redis 锁定状态，被锁定时直接返回 429，不查库也不做哈希校验
+账号不存在时同样做一次哈希校验，失败响应的耗时和内容与密码错误一致
+"""
+@auth_bp.route('/api/login', methods = ['POST'])
+def login():
+    data = request.get_json(silent=True) or {}
+    account_1 = data.get('account')
+    password_1 = data.get('password')
+    if not isinstance(account_1, str) or not isinstance(password_1, str) or not account_1 or not password_1:
+        return error('账号和密码不能为空', 400)
+
+    redis_client = get_redis()
+    client_ip = request.remote_addr or 'unknown'
+    guard_account = f'{g.shop_id}:{account_1}'   # 失败计数按店铺+账号统计，IP 计数跨店铺共享
+    wait = check_login_allowed(guard_account, client_ip, redis_client)
+    if wait:
+        response, code = error(f'登录失败次数过多，请 {wait} 秒后再试', 429)
+        response.headers['Retry-After'] = str(wait)
+        return response, code
+
+    user = Users.query.filter_by(shop_id = g.shop_id, account = account_1).first()
+    if user:
+        verified = check_password_hash(user.password, password_1)
+    else:
+        check_password_hash(dummy_password_hash(), password_1)
+        verified = False
+    if not verified:
+        record_login_failure(guard_account, client_ip, redis_client)
+        return error('账号或密码错误', 401)
+
+    # 如果用户存在并且密码匹配正确
+    record_login_success(guard_account, client_ip, redis_client)
+    # 生成 32 位随机 Token
+    session_token = secrets.token_hex(16)
+    # 存入到redis中
+    redis_key = session_key(session_token)
+    # 设置七天有效期
+    try:
+        if redis_client is None:
+            raise ConnectionError('Redis 处于降级模式')
+        redis_client.setex(redis_key, 7*24*3600,str(user.id) )
+    except Exception as e:
+        print(f"[Error] Redis 存储 Token 失败，改用签名 Token: {e}")
+        signed_token = issue_signed_token(user)
+        if not signed_token:
+            return error('服务器会话存储故障', 500)
+        ttl = current_app.config['FALLBACK_SESSION_TTL']
+        return success({
+            'token': signed_token,
+            'expires_in': f'{ttl} seconds',
+        }, '登录成功')
+
+    #返回 Token 给前端，不返回数据库 ID
+    return success({
+        'token': session_token,
+        'expires_in': '7 days',
+    }, '登录成功')
+
+
+# 注册功能
+@auth_bp.route('/api/register',methods = ['POST'])
+def register():
+    data = request.get_json()
+    account = data.get('account')
+    password = data.get('password')
+
+    if not account or not password:
+        return error('账号和密码不能为空',400)
+    if len(account) != 11 or not account.isdigit():
+        return error("账号必须是11位数字", 400)
+    if not validate_password(password):
+        return error("密码必须为8位，且包含大小写字母和数字", 400)
+    if Users.query.filter_by(shop_id=g.shop_id, account=account).first():
+        return error("账号已存在", 409)        
+             
+    hashed_pw = generate_password_hash(password)
+    new_user = Users(shop_id=g.shop_id, account=account, password=hashed_pw)
+    db.session.add(new_user)
+    db.session.commit()
+    return success(message="注册成功")
+
+    
+# 登出功能
+@auth_bp.route('/api/logout', methods = ['POST'])
+def logout():
+    # 前端需要在 Header 中带上 Token
+    revoke_session(get_request_token())
+    return success(message='已登出')
+
+
+# 注销(删除账号)功能
+@auth_bp.route('/api/delete-account', methods = ['DELETE'])
+def delete_account():
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+    data  = request.get_json()
+    verify_method = data.get('verify_method')# password 或者sms
+
+    user_delete = g.current_user
+
+    if not user_delete:
+        return error(message='用户不存在', code=404)
+    # 分支验证
+    verify = False
+    if verify_method == 'password':
+        password = data.get('password')
+        # 密码验证
+        if not password :
+            return error(message= '请输入密码', code = 400)
+        if check_password_hash(user_delete.password, password):
+            verify = True
+        else:
+            return error(message='密码错误，验证失败', code=400)
+
+        
+    elif verify_method == 'sms':
+        sms_code = data.get('sms_code')
+        if not sms_code:
+            return error(message= '请输入验证码', code = 400)
+        else:
+            sms_result = verify_sms_code(
+            phone=g.current_user.account, 
+            input_code=sms_code, 
+            redis_client=get_redis()
+        )
+        
+        if sms_result.get('success'):
+            verify = True
+        else:
+            return error(message=sms_result.get('message', '验证码无效'), code=400)
+        
+    else:
+        return error(message='不支持的验证方式 (仅支持 password 或 sms)', code=400)     
+       
+    if verify:
+    # 尝试删除账号
+        try:
+            revoke_session(get_request_token())
+            db.session.delete(user_delete)
+            db.session.commit()
+            return success(message='账号注销成功')
+        except Exception as e:
+            db.session.rollback() # 撤销工作台里所有未提交的操作，恢复到操作前的状态
+            return error(message=f'账号注销失败:{str(e)}',code = 500)
+            
+    
+    
+
+
+# 密码修改功能
+@auth_bp.route('/api/change-password',methods = ['PATCH'])
+def change_password():
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+    data = request.get_json()
+    new_password = data.get('new_password')
+    verify_method = data.get('verify_method')# password 或者sms
+    
+    # 密码验证
+    if not new_password:
+        return error(message= '新密码不能为空', code = 400)
+    if not validate_password(new_password):
+        return error(message= '密码必须为8位，且包含大小写字母和数字', code = 400)
+
+    # 分支验证
+    verify = False
+    user = g.current_user
+    if not user:
+        return error(message='用户不存在', code=404)
+    if verify_method == 'password':
+        old_password = data.get('old_password')
+        # 密码验证
+        if not old_password :
+            return error(message= '请输入旧密码', code = 400)
+        if check_password_hash(user.password, old_password):
+            verify = True
+        else:
+            return error(message='密码错误，验证失败', code=400)
+
+        
+    elif verify_method == 'sms':
+        sms_code = data.get('sms_code')
+        if not sms_code:
+            return error(message= '请输入验证码', code = 400)
+        else:
+            sms_result = verify_sms_code(
+            phone=user.account, 
+            input_code=sms_code, 
+            redis_client=get_redis()
+        )
+        
+        if sms_result.get('success'):
+            verify = True
+        else:
+            return error(message=sms_result.get('message', '验证码无效'), code=400)
+        
+    else:
+        return error(message='不支持的验证方式 (仅支持 password 或 sms)', code=400)     
+       
+    if verify:
+    
+        try:  # 异常捕获
+            user.password = generate_password_hash(new_password)
+            db.session.commit()
+            # 删除已有的token要求重新登录
+            revoke_session(get_request_token())
+            return success(message='密码修改成功，请重新登录')
+        except Exception as e:
+            db.session.rollback()
+            return error(message=f'密码修改失败', code=500)
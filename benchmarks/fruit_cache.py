@@ -0,0 +1,98 @@
+# ==============================================================================
+# 文件名: benchmarks/fruit_cache.py
+# 功能: 果蔬详情两级缓存各层命中延迟
+# 描述:
+#   在内存 SQLite 中写入若干品种，分别测量三种命中情况下 FruitCache.get() 的延迟：
+#     local : 进程内 LRU 命中
+#     redis : 本地未命中、Redis 命中（每次先清空本地缓存）
+#     db    : 两级都未命中，回源数据库（每次先清空本地缓存并删除 Redis key）
+#   Redis 连接取自 .env / 环境变量（REDIS_HOST、REDIS_PORT）；
+#   加 --fake-redis 时使用 fakeredis（需自行安装），此时 redis 一栏不含网络开销
+# 用法:
+#   python benchmarks/fruit_cache.py --rows 1000 --lookups 5000
+# ==============================================================================
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from extensions import get_redis
+from fruit_cache import REDIS_KEY, get_fruit_cache
+from models import db
+from seed import seed_catalog
+
+SHOP_ID = 1
+
+
+def percentile(samples:list, p:float)->float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def measure(ids:list, before_each)->list:
+    cache = get_fruit_cache()
+    timings = []
+    for fruit_id in ids:
+        before_each(fruit_id)
+        start = time.perf_counter()
+        cache.get(SHOP_ID, fruit_id)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='两级缓存各层命中延迟')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--lookups', type=int, default=5000)
+    parser.add_argument('--fake-redis', action='store_true')
+    args = parser.parse_args()
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'AUDIT_ENABLED': False,
+        'FRUIT_CACHE_LOCAL_SIZE': args.rows,
+        'FRUIT_CACHE_LOCAL_TTL': 3600
+    })
+    if args.fake_redis:
+        import fakeredis
+        app.extensions['redis'] = fakeredis.FakeRedis(decode_responses=True)
+
+    with app.test_request_context():
+        db.create_all()
+        seed_catalog(args.rows)
+        redis_client = get_redis()
+        try:
+            redis_client.ping()
+        except Exception as e:
+            print(f"❌ Redis 不可用（{e}），可加 --fake-redis 运行")
+            sys.exit(1)
+        cache = get_fruit_cache()
+        rng = random.Random(42)
+        ids = [rng.randint(1, args.rows) for _ in range(args.lookups)]
+
+        def evict_all(fruit_id):
+            cache.local.pop((SHOP_ID, fruit_id))
+            redis_client.delete(REDIS_KEY.format(SHOP_ID, fruit_id))
+
+        def evict_local(fruit_id):
+            cache.local.pop((SHOP_ID, fruit_id))
+
+        db_us = measure(ids, evict_all)
+        redis_us = measure(ids, evict_local)   # 上一轮已回填 Redis
+        measure(ids, lambda _: None)           # 预热本地缓存
+        local_us = measure(ids, lambda _: None)
+
+        print(f"{'tier':<6} {'p50 us':>10} {'p99 us':>10} {'mean us':>10}")
+        for name, samples in (('local', local_us), ('redis', redis_us), ('db', db_us)):
+            print(f"{name:<6} {percentile(samples, 0.5):>10.1f} {percentile(samples, 0.99):>10.1f} {statistics.mean(samples):>10.1f}")
+        redis_client.delete(*[REDIS_KEY.format(SHOP_ID, i) for i in range(1, args.rows + 1)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# ==============================================================================
+# 文件名: benchmarks/read_model.py
+# 功能: 只读投影 vs ORM 加载 的内存与吞吐对比
+# 描述:
+#   在内存 SQLite 中写入 N 条品种+详情，分别用三种方式读取全部行并转成字典：
+#     orm-lazy   : FruitVariety.query + to_dict()（原列表接口的写法，详情逐条懒加载）
+#     orm-joined : FruitVariety.query.options(joinedload) + to_dict()
+#     projection : projections.select_fruits() + FruitRow.to_dict()
+#   记录耗时中位数与 tracemalloc 峰值内存
+# 用法:
+#   python benchmarks/read_model.py --rows 10000 --runs 5
+# ==============================================================================
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import joinedload
+from app import create_app
+from models import db, FruitVariety
+from seed import seed_catalog
+from projections import select_fruits, to_fruit_row
+
+
+def load_orm_lazy():
+    return [f.to_dict() for f in FruitVariety.query.all()]
+
+
+def load_orm_joined():
+    return [f.to_dict() for f in FruitVariety.query.options(joinedload(FruitVariety.detail)).all()]
+
+
+def load_projection():
+    return [to_fruit_row(r).to_dict() for r in db.session.execute(select_fruits()).all()]
+
+
+def measure(fn, runs:int):
+    timings = []
+    for _ in range(runs):
+        db.session.expunge_all()   # 每轮都从空的身份映射开始
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    db.session.expunge_all()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.expunge_all()
+    return statistics.median(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='只读投影与 ORM 加载对比')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    with app.app_context():
+        db.create_all()
+        seed_catalog(args.rows)
+        print(f"{'mode':<12} {'median ms':>10} {'rows/s':>12} {'peak MiB':>10}")
+        for name, fn in (('orm-lazy', load_orm_lazy), ('orm-joined', load_orm_joined), ('projection', load_projection)):
+            seconds, peak = measure(fn, args.runs)
+            print(f"{name:<12} {seconds * 1000:>10.1f} {args.rows / seconds:>12.0f} {peak / 2**20:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
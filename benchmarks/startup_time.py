@@ -0,0 +1,92 @@
+# ==============================================================================
+# 文件名: benchmarks/startup_time.py
+# 功能: 冷启动耗时测试
+# 描述:
+#   每轮启动一个新的 Python 子进程，分别测量 `import app` 和 `create_app()` 的耗时，
+#   多轮取中位数；总耗时超过目标值时以非零状态码退出，可手动或在发布前运行
+# 用法:
+#   python benchmarks/startup_time.py --runs 5 --target-ms 600
+#   python benchmarks/startup_time.py --importtime      # 额外列出最耗时的模块
+# ==============================================================================
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app()
+t2 = time.perf_counter()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'create_ms': (t2 - t1) * 1000}))
+"""
+
+
+def probe_env():
+    env = dict(os.environ)
+    # 没有 .env 时用内存 SQLite，保证脚本可以独立运行；create_app 不会连接数据库和 Redis
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    return env
+
+
+def run_once():
+    out = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=ROOT, env=probe_env(), capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def top_imports(limit:int = 15):
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app; app.create_app()'],
+        cwd=ROOT, env=probe_env(), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # 只看顶层模块及其直接导入（importtime 每深一层多缩进两个空格）
+        if len(name) - len(name.lstrip()) <= 3:
+            rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量应用冷启动耗时')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--target-ms', type=float, default=600.0, help='import + create_app 中位数上限')
+    parser.add_argument('--importtime', action='store_true', help='列出累计耗时最高的顶层模块')
+    args = parser.parse_args()
+
+    samples = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(s['import_ms'] for s in samples)
+    create_ms = statistics.median(s['create_ms'] for s in samples)
+    total_ms = import_ms + create_ms
+
+    print(f"import app     : {import_ms:8.1f} ms")
+    print(f"create_app()   : {create_ms:8.1f} ms")
+    print(f"total (median) : {total_ms:8.1f} ms  (target {args.target_ms:.0f} ms, {args.runs} runs)")
+
+    if args.importtime:
+        print("\n累计耗时最高的顶层模块:")
+        for cumulative_us, name in top_imports():
+            print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    if total_ms > args.target_ms:
+        print(f"❌ 启动耗时超出目标 {total_ms - args.target_ms:.1f} ms")
+        sys.exit(1)
+    print("✅ 启动耗时在目标范围内")
+
+
+if __name__ == '__main__':
+    main()
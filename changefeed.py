@@ -0,0 +1,186 @@
+# ==============================================================================
+# 文件名: changefeed.py
+# 功能: 果蔬数据变更流
+# 描述:
+#   1. 增删改提交成功后，把变更事件 XADD 到 Redis Stream（近似 MAXLEN 截断，内存有界）
+#      每个店铺一个 Stream（fruit_changes:<店铺>），客户端只会收到本店铺的变更
+#   2. 流水号 seq 即 Stream 消息 ID，客户端据此断点续传
+#   3. 提供按 seq 追赶（XREAD 非阻塞）和 SSE 长连接（XREAD BLOCK）两种读取方式
+#   4. Redis 降级期间的变更无法发布：记下受影响的店铺，恢复时向其 Stream 追加一条 op=gap 的
+#      哨兵消息，并把它的 ID 写入 fruit_changes_gap:<店铺>；since 早于该 ID 的客户端会收到
+#      truncated（SSE 为 truncated 事件），需要重新全量拉取。受影响的店铺只记录在本进程内
+#   注意：SSE 每个连接占用一个工作线程/协程，生产环境建议使用 gevent 等异步 worker
+# ==============================================================================
+
+from typing import TYPE_CHECKING
+from redis.exceptions import ResponseError
+import json
+import re
+import threading
+import weakref
+from extensions import get_redis_state
+
+if TYPE_CHECKING:   # 仅用于类型标注
+    from redis import Redis
+
+CHANGE_STREAM = 'fruit_changes:{}'
+GAP_KEY = 'fruit_changes_gap:{}'   # 最近一次缺口哨兵消息的 ID
+STREAM_MAXLEN = 100000         # 每个店铺保留最近约 10 万条变更
+SSE_BLOCK_MS = 15000           # 无新事件时每 15 秒发送一次心跳
+SEQ_PATTERN = re.compile(r'^\d+(-\d+)?$')
+
+_gap_shops = set()                  # 本进程内有变更未能发布的店铺
+_gap_lock = threading.Lock()
+_gap_hooked = weakref.WeakSet()     # 已注册恢复回调的 RedisState
+
+
+def valid_seq(seq:str)->bool:
+    return bool(seq) and bool(SEQ_PATTERN.match(seq))
+
+
+# 发布变更事件
+"""
+events: [{'op': 'create'|'update'|'delete', 'id': 品种ID, 'data': dict}]
+必须在数据库提交之后调用；发布失败只记录日志，不影响已经成功的写操作
+"""
+def publish_changes(shop_id:int, events:list, redis_client:'Redis'):
+    if not events:
+        return
+    if not redis_client:
+        _remember_gap(shop_id)
+        return
+    stream = CHANGE_STREAM.format(shop_id)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for e in events:
+            pipe.xadd(stream, {
+                'op': e['op'],
+                'id': e['id'],
+                'data': json.dumps(e.get('data'), ensure_ascii=False, default=str)
+            }, maxlen=STREAM_MAXLEN, approximate=True)
+        pipe.execute()
+    except Exception as e:
+        print(f"[Error] 变更事件发布失败: {e}")
+        _remember_gap(shop_id)
+
+
+# 记下有变更丢失的店铺，Redis 恢复时写入缺口标记
+def _remember_gap(shop_id:int):
+    state = get_redis_state()
+    with _gap_lock:
+        _gap_shops.add(shop_id)
+        if state not in _gap_hooked:
+            state.on_recover(_record_gaps)
+            _gap_hooked.add(state)
+
+
+# Redis 恢复时调用：为每个受影响的店铺追加哨兵消息并更新缺口标记
+"""
+哨兵的 ID 大于降级前的所有消息，只保留最新一次缺口即可：早于旧缺口的 since 必然也早于新缺口
+写入失败时保留店铺，下次恢复时重试
+"""
+def _record_gaps(redis_client:'Redis'):
+    with _gap_lock:
+        shops = list(_gap_shops)
+    for shop_id in shops:
+        seq = redis_client.xadd(CHANGE_STREAM.format(shop_id), {'op': 'gap'},
+                                maxlen=STREAM_MAXLEN, approximate=True)
+        redis_client.set(GAP_KEY.format(shop_id), seq)
+        with _gap_lock:
+            _gap_shops.discard(shop_id)
+
+
+def _to_event(seq, fields:dict)->dict:
+    return {
+        'seq': seq,
+        'op': fields.get('op'),
+        'id': int(fields['id']) if fields.get('id') else None,
+        'data': json.loads(fields['data']) if fields.get('data') else None
+    }
+
+
+def _seq_key(seq:str):
+    ms, _, n = seq.partition('-')
+    return int(ms), int(n or 0)
+
+
+# since 之后是否有消息已被删除（XDEL）或截断（MAXLEN）
+"""
+按 XINFO STREAM 判断，与 Redis 计算消费组 lag 的方式一致：
+max-deleted-entry-id 晚于 since 说明有消息被删除；entries-added 等于 length 说明从未丢弃过消息；
+否则截断的消息都早于 first-entry（Stream 已空时为 last-generated-id），since 早于它即有缺口
+Redis 7 以下没有 max-deleted-entry-id / entries-added，只按 first-entry 判断
+since 为 0 表示从头读取，不算缺口
+"""
+def _stream_truncated(redis_client:'Redis', stream:str, since:str)->bool:
+    since_key = _seq_key(since)
+    if since_key == (0, 0):
+        return False
+    try:
+        info = redis_client.xinfo_stream(stream)
+    except ResponseError:   # Stream 不存在，还没有任何变更
+        return False
+    deleted = info.get('max-deleted-entry-id')
+    if deleted and since_key < _seq_key(deleted):
+        return True
+    if info.get('entries-added') is not None and info['entries-added'] == info['length']:
+        return False
+    first = info.get('first-entry')
+    boundary = first[0] if first else info.get('last-generated-id')
+    return bool(boundary) and since_key < _seq_key(boundary)
+
+
+# 除 Stream 本身的截断外，缺口标记晚于 since 说明降级期间有变更未能发布
+def _is_truncated(redis_client:'Redis', shop_id:int, since:str)->bool:
+    if _seq_key(since) == (0, 0):
+        return False
+    gap = redis_client.get(GAP_KEY.format(shop_id))
+    if gap and _seq_key(since) < _seq_key(gap):
+        return True
+    return _stream_truncated(redis_client, CHANGE_STREAM.format(shop_id), since)
+
+
+# 追赶模式：返回 since 之后的最多 count 条事件
+"""
+返回 (事件列表, 是否有缺口)；since 之后的事件已被截断、删除或未能发布时客户端应重新全量拉取 /api/fruits
+缺口哨兵消息不返回给客户端
+"""
+def read_since(shop_id:int, since:str, count:int, redis_client:'Redis'):
+    stream = CHANGE_STREAM.format(shop_id)
+    response = redis_client.xread({stream: since}, count=count)
+    events = [_to_event(seq, fields) for _, entries in response for seq, fields in entries
+              if fields.get('op') != 'gap']
+    return events, _is_truncated(redis_client, shop_id, since)
+
+
+# SSE 长连接：从 last_seq 之后开始推送，'$' 表示只推送新事件
+def sse_events(shop_id:int, last_seq:str, redis_client:'Redis'):
+    stream = CHANGE_STREAM.format(shop_id)
+    # 建议客户端断线 3 秒后重连，重连时浏览器会带上 Last-Event-ID
+    yield 'retry: 3000\n\n'
+    if last_seq == '$':
+        # 把 '$' 换成当前最新的 ID，避免两次 XREAD 之间产生的事件被跳过
+        latest = redis_client.xrevrange(stream, count=1)
+        last_seq = latest[0][0] if latest else '0'
+    elif _stream_truncated(redis_client, stream, last_seq):
+        # 断线期间的事件已被截断，通知客户端重新全量拉取；降级缺口由下面读到的哨兵消息通知
+        yield 'event: truncated\ndata: {}\n\n'
+    while True:
+        try:
+            response = redis_client.xread({stream: last_seq}, count=100, block=SSE_BLOCK_MS)
+        except Exception as e:
+            print(f"[Error] 变更流读取失败: {e}")
+            yield 'event: error\ndata: {"message": "变更流暂不可用"}\n\n'
+            return
+        if not response:
+            yield ': keep-alive\n\n'
+            continue
+        for _, entries in response:
+            for seq, fields in entries:
+                last_seq = seq
+                if fields.get('op') == 'gap':
+                    # 连接期间 Redis 曾降级，这之前的变更可能缺失
+                    yield f"id: {seq}\nevent: truncated\ndata: {{}}\n\n"
+                    continue
+                event = _to_event(seq, fields)
+                yield f"id: {seq}\nevent: {event['op']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
@@ -0,0 +1,70 @@
+# ==============================================================================
+# 文件名: compression.py
+# 功能: 响应压缩
+# 描述:
+#   根据请求头 Accept-Encoding 协商 br / gzip，对超过阈值的 JSON 响应压缩
+#   brotli 为可选依赖（pip install brotli），未安装时只使用 gzip
+#   流式响应（如 SSE）和已编码的响应不处理
+# 配置:
+#   COMPRESS_MIN_SIZE  小于该字节数的响应不压缩，默认 1024
+#   COMPRESS_LEVEL     gzip 压缩级别，默认 6
+# ==============================================================================
+
+from flask import request
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html')
+
+
+def init_compression(app):
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+
+    @app.after_request
+    def compress_response(response):
+        return compress(response, app.config['COMPRESS_MIN_SIZE'], app.config['COMPRESS_LEVEL'])
+
+
+# 选择编码：客户端都接受时优先 br，权重更高者优先
+def choose_encoding(accept)->str:
+    gzip_q = accept.quality('gzip')
+    br_q = accept.quality('br') if brotli else 0
+    if br_q and br_q >= gzip_q:
+        return 'br'
+    if gzip_q:
+        return 'gzip'
+    return None
+
+
+def compress(response, min_size:int, level:int):
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    if response.status_code < 200 or response.status_code >= 300 or 'Content-Encoding' in response.headers:
+        return response
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        body = brotli.compress(data, quality=5)
+    else:
+        body = gzip.compress(data, compresslevel=level)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    # 编码后的内容与原始内容字节不同，强 ETag 改为弱 ETag
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response.headers['ETag'] = 'W/' + etag
+    return response
@@ -0,0 +1,40 @@
+# ==============================================================================
+# 文件名: config.py
+# 功能: 应用配置
+# 描述: 在 create_app 中实例化，此时 .env 已加载到 os.environ
+# ==============================================================================
+
+import os
+
+
+class Config:
+    def __init__(self):
+        self.SECRET_KEY = os.environ.get('SECRET_KEY')
+        self.SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+        self.SQLALCHEMY_TRACK_MODIFICATIONS = False
+        self.DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
+        self.DEFAULT_SHOP_ID = int(os.environ.get('DEFAULT_SHOP_ID', 1))   # 请求不带 X-Shop-Id 时使用的店铺
+
+        # 反向代理层数：部署在 Nginx 等代理之后时，按 X-Forwarded-* 还原客户端 IP、协议和主机
+        # 只能设为实际经过的代理层数，0 为不信任这些请求头（直连时伪造的请求头会被忽略）
+        self.PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+        self.PROXY_FIX_X_PROTO = int(os.environ.get('PROXY_FIX_X_PROTO', 0))
+        self.PROXY_FIX_X_HOST = int(os.environ.get('PROXY_FIX_X_HOST', 0))
+
+        # redis配置信息，首次使用时才建立连接
+        self.REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
+        self.REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+        self.REDIS_PASSWORD = os.environ.get('REDIS_PASSWORD')  # 从 .env 获取密码
+        self.REDIS_SOCKET_CONNECT_TIMEOUT = float(os.environ.get('REDIS_SOCKET_CONNECT_TIMEOUT', 5))
+        self.REDIS_RETRY_INTERVAL = float(os.environ.get('REDIS_RETRY_INTERVAL', 5))   # 降级后重连间隔（秒）
+        self.FALLBACK_SESSION_TTL = int(os.environ.get('FALLBACK_SESSION_TTL', 3600))   # Redis 不可用时签名 Token 的有效期（秒）
+
+        # 果蔬详情两级缓存：本地 LRU 条数/秒数，Redis 秒数
+        self.FRUIT_CACHE_ENABLED = os.environ.get('FRUIT_CACHE_ENABLED', 'True').lower() == 'true'
+        self.FRUIT_CACHE_LOCAL_SIZE = int(os.environ.get('FRUIT_CACHE_LOCAL_SIZE', 1024))
+        self.FRUIT_CACHE_LOCAL_TTL = float(os.environ.get('FRUIT_CACHE_LOCAL_TTL', 5))
+        self.FRUIT_CACHE_REDIS_TTL = int(os.environ.get('FRUIT_CACHE_REDIS_TTL', 300))
+
+        # 慢查询日志：阈值（毫秒），0 为关闭；管理员账号，逗号分隔
+        self.SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 0))
+        self.ADMIN_ACCOUNTS = [a.strip() for a in os.environ.get('ADMIN_ACCOUNTS', '').split(',') if a.strip()]
@@ -0,0 +1,159 @@
+# ==============================================================================
+# 文件名: extensions.py
+# 功能: 扩展实例与延迟初始化
+# 描述:
+#   1. Flask-Login 登录管理器
+#   2. Redis 客户端：首次调用 get_redis() 时才创建，启动阶段不再连接和 ping；
+#      连接失败后进入降级模式，get_redis() 返回 None，后台线程定时重连，恢复后自动启用
+#   3. Flask-Migrate：只在 flask 命令行中初始化，Web 进程不导入 alembic
+# ==============================================================================
+
+from flask import current_app
+from flask_login import LoginManager
+import os
+import threading
+import time
+import click
+
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'  # 未登录时重定向到login视图函数
+
+_redis_lock = threading.Lock()
+
+
+# Redis 可用状态
+"""
+任一命令出现连接/超时异常时标记为不可用，并启动后台线程每隔 REDIS_RETRY_INTERVAL 秒 ping 一次，
+ping 成功后恢复可用并执行 on_recover 注册的回调（如清理降级期间可能过期的缓存）
+不可用期间 get_redis() 直接返回 None，请求不再逐个等待连接超时
+"""
+class RedisState:
+    def __init__(self, client, retry_interval:float):
+        import redis
+        self.client = client
+        self.retry_interval = retry_interval
+        self.errors = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+        self.available = True
+        self.guarded = GuardedRedis(client, self)
+        self._callbacks = []
+        self._monitor = None
+        self._monitor_pid = None
+        self._lock = threading.Lock()
+
+    def on_recover(self, callback):
+        self._callbacks.append(callback)
+
+    def mark_down(self, e):
+        if self.available:
+            print(f"❌ Redis 不可用，进入降级模式: {e}")
+        self.available = False
+        self.ensure_monitor()
+
+    # fork 出的子进程里没有重连线程，需要重新启动
+    def ensure_monitor(self):
+        if self._monitor is not None and self._monitor.is_alive() and self._monitor_pid == os.getpid():
+            return
+        with self._lock:
+            if self._monitor is not None and self._monitor.is_alive() and self._monitor_pid == os.getpid():
+                return
+            self._monitor_pid = os.getpid()
+            self._monitor = threading.Thread(target=self._reconnect, name='redis-reconnect', daemon=True)
+            self._monitor.start()
+
+    def _reconnect(self):
+        while not self.available:
+            time.sleep(self.retry_interval)
+            try:
+                self.client.ping()
+            except Exception:
+                continue
+            for callback in self._callbacks:
+                try:
+                    callback(self.client)
+                except Exception as e:
+                    print(f"[Warning] Redis 恢复回调执行失败: {e}")
+            self.available = True
+            print("✅ Redis 已恢复，退出降级模式")
+
+
+# 包装 Redis 客户端：行为与原客户端一致，出现连接类异常时上报 RedisState 后继续抛出
+class GuardedRedis:
+    def __init__(self, client, state:RedisState):
+        self._client = client
+        self._state = state
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name == 'pipeline':
+            return lambda *args, **kwargs: GuardedPipeline(attr(*args, **kwargs), self._state)
+        if not callable(attr) or name == 'pubsub':
+            return attr
+
+        def call(*args, **kwargs):
+            try:
+                return attr(*args, **kwargs)
+            except self._state.errors as e:
+                self._state.mark_down(e)
+                raise
+        return call
+
+
+class GuardedPipeline:
+    def __init__(self, pipe, state:RedisState):
+        self._pipe = pipe
+        self._state = state
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+    def execute(self, *args, **kwargs):
+        try:
+            return self._pipe.execute(*args, **kwargs)
+        except self._state.errors as e:
+            self._state.mark_down(e)
+            raise
+
+
+def get_redis_state(app=None)->RedisState:
+    app = app or current_app._get_current_object()
+    state = app.extensions.get('redis_state')
+    if state is None:
+        with _redis_lock:
+            state = app.extensions.get('redis_state')
+            if state is None:
+                client = app.extensions.get('redis')
+                if client is None:
+                    import redis   # 用于连接和操作 Redis 数据库
+                    client = redis.Redis(
+                        host=app.config['REDIS_HOST'],
+                        port=app.config['REDIS_PORT'],
+                        password=app.config['REDIS_PASSWORD'],  # 传入密码
+                        decode_responses=True,
+                        socket_connect_timeout=app.config['REDIS_SOCKET_CONNECT_TIMEOUT']
+                    )
+                    app.extensions['redis'] = client
+                state = RedisState(client, app.config.get('REDIS_RETRY_INTERVAL', 5))
+                app.extensions['redis_state'] = state
+    return state
+
+
+# 获取当前应用的 Redis 客户端
+"""
+redis.Redis() 只创建连接池，真正的连接在第一条命令时建立
+处于降级模式时返回 None，调用方需按 Redis 不可用处理
+测试时可在首次调用前写入 app.extensions['redis'] 替换为本地替身
+"""
+def get_redis():
+    state = get_redis_state()
+    if not state.available:
+        state.ensure_monitor()
+        return None
+    return state.guarded
+
+
+# 数据库迁移只在 `flask db ...` 等命令行场景需要
+def init_migrate(app, db):
+    if click.get_current_context(silent=True) is None:
+        return
+    from flask_migrate import Migrate
+    Migrate(app, db)
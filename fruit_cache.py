@@ -0,0 +1,217 @@
+# ==============================================================================
+# 文件名: fruit_cache.py
+# 功能: 果蔬详情两级缓存
+# 描述:
+#   读取顺序：进程内 LRU（短 TTL）→ Redis（fruit:detail:<店铺>:<id>）→ 数据库投影查询
+#   缓存 key 都带店铺，一个店铺的请求不会读到其他店铺的数据
+#   写操作提交后调用 invalidate：删除 Redis 中的 key，并通过 Pub/Sub 通知所有 worker
+#   清除各自的本地缓存；订阅线程断开期间，本地缓存最多陈旧 FRUIT_CACHE_LOCAL_TTL 秒
+#   回源与失效并发时防止旧数据写回：invalidate 会 INCR 每个 id 的版本号 key（fruit:gen:<店铺>:<id>），
+#   回源前 WATCH 该 key，回源期间发生失效则 EXEC 失败、不写 Redis；
+#   本地缓存同理，读取开始后发生过失效就不写本地缓存
+#   Redis 不可用时自动退化为 本地缓存 → 数据库；恢复后清空 Redis 中的详情缓存，
+#   因为降级期间的失效通知已经丢失
+# 配置:
+#   FRUIT_CACHE_ENABLED     是否开启，默认 True
+#   FRUIT_CACHE_LOCAL_SIZE  每个 worker 本地缓存条数，默认 1024
+#   FRUIT_CACHE_LOCAL_TTL   本地缓存秒数，默认 5
+#   FRUIT_CACHE_REDIS_TTL   Redis 缓存秒数，默认 300
+# ==============================================================================
+
+from collections import OrderedDict
+from flask import current_app
+from redis.exceptions import WatchError
+import json
+import os
+import threading
+import time
+from extensions import get_redis, get_redis_state
+from projections import get_fruit
+
+REDIS_KEY = 'fruit:detail:{}:{}'
+GEN_KEY = 'fruit:gen:{}:{}'     # 失效版本号，每次 invalidate 加一
+INVALIDATE_CHANNEL = 'fruit_cache_invalidate'
+
+
+# 进程内 LRU，带过期时间，线程安全
+class LocalLRU:
+    def __init__(self, max_size:int, ttl:float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (过期时间, value)
+        self._lock = threading.Lock()
+        self.epoch = 0   # 每次删除/清空加一，用于丢弃失效之前读到的数据
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    # epoch 为读取开始时的 self.epoch；之后发生过删除/清空则不写入
+    def set(self, key, value, epoch:int = None):
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self.epoch += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.epoch += 1
+
+
+class FruitCache:
+    def __init__(self, app):
+        self.app = app
+        self.local = LocalLRU(app.config['FRUIT_CACHE_LOCAL_SIZE'], app.config['FRUIT_CACHE_LOCAL_TTL'])
+        self.redis_ttl = app.config['FRUIT_CACHE_REDIS_TTL']
+        self._listener = None
+        self._listener_pid = None
+        self._recover_registered = False
+        self._lock = threading.Lock()
+
+    # 取单个果蔬的字典（结构同 FruitRow.to_dict），不存在时返回 None
+    def get(self, shop_id:int, fruit_id:int):
+        self._ensure_listener()
+        local_key = (shop_id, fruit_id)
+        epoch = self.local.epoch
+        data = self.local.get(local_key)
+        if data is not None:
+            return data
+
+        redis_client = get_redis()
+        key = REDIS_KEY.format(shop_id, fruit_id)
+        try:
+            cached = redis_client.get(key) if redis_client is not None else None
+            if cached:
+                data = json.loads(cached)
+                self.local.set(local_key, data, epoch)
+                return data
+        except Exception as e:
+            print(f"[Warning] Redis 读取缓存失败，回源数据库: {e}")
+            redis_client = None
+
+        # 未命中之后才 WATCH：在此之前的失效已经提交，回源读到的是新数据
+        fill = None
+        if redis_client is not None:
+            try:
+                fill = redis_client.pipeline()
+                fill.watch(GEN_KEY.format(shop_id, fruit_id))
+            except Exception as e:
+                print(f"[Warning] Redis 写入缓存失败: {e}")
+                fill = None
+        try:
+            fruit = get_fruit(shop_id, fruit_id)
+            if fruit is None:
+                return None
+            data = fruit.to_dict()
+            if fill is not None:
+                try:
+                    fill.multi()
+                    fill.setex(key, self.redis_ttl, json.dumps(data, ensure_ascii=False))
+                    fill.execute()
+                except WatchError:
+                    pass   # 回源期间已失效，这份数据可能是旧的，不写回
+                except Exception as e:
+                    print(f"[Warning] Redis 写入缓存失败: {e}")
+        finally:
+            if fill is not None:
+                fill.reset()
+        self.local.set(local_key, data, epoch)
+        return data
+
+    # 写操作提交后调用，一批 id 只需一次 Redis 往返
+    def invalidate(self, shop_id:int, fruit_ids:list):
+        if not fruit_ids:
+            return
+        for fruit_id in fruit_ids:
+            self.local.pop((shop_id, fruit_id))
+        redis_client = get_redis()
+        if redis_client is None:
+            return
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for fruit_id in fruit_ids:
+                # 版本号只需活过一次回源，随详情缓存一起过期
+                pipe.incr(GEN_KEY.format(shop_id, fruit_id))
+                pipe.expire(GEN_KEY.format(shop_id, fruit_id), self.redis_ttl)
+            pipe.delete(*[REDIS_KEY.format(shop_id, i) for i in fruit_ids])
+            pipe.publish(INVALIDATE_CHANNEL, json.dumps({'shop_id': shop_id, 'ids': list(fruit_ids)}))
+            pipe.execute()
+        except Exception as e:
+            print(f"[Warning] 缓存失效通知失败，依赖 TTL 过期: {e}")
+
+    # 订阅线程在首次读取时启动；fork 后的子进程需要重新启动
+    def _ensure_listener(self):
+        if self._listener is not None and self._listener.is_alive() and self._listener_pid == os.getpid():
+            return
+        redis_client = get_redis()
+        if redis_client is None:
+            return
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive() and self._listener_pid == os.getpid():
+                return
+            if not self._recover_registered:
+                get_redis_state().on_recover(self._purge_redis)
+                self._recover_registered = True
+            self._listener_pid = os.getpid()
+            self._listener = threading.Thread(
+                target=self._listen, args=(redis_client,), name='fruit-cache-listener', daemon=True)
+            self._listener.start()
+
+    # Redis 恢复时调用：清空所有详情缓存
+    def _purge_redis(self, redis_client):
+        keys = []
+        for key in redis_client.scan_iter(match=REDIS_KEY.format('*', '*'), count=500):
+            keys.append(key)
+            if len(keys) >= 500:
+                redis_client.delete(*keys)
+                keys = []
+        if keys:
+            redis_client.delete(*keys)
+        self.local.clear()
+
+    def _listen(self, redis_client):
+        while True:
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATE_CHANNEL)
+                # 重新订阅期间可能漏掉失效通知，清空本地缓存
+                self.local.clear()
+                for message in pubsub.listen():
+                    if message.get('type') != 'message':
+                        continue
+                    payload = json.loads(message['data'])
+                    for fruit_id in payload['ids']:
+                        self.local.pop((payload['shop_id'], fruit_id))
+            except Exception as e:
+                print(f"[Warning] 缓存失效订阅断开，5 秒后重连: {e}")
+                self.local.clear()
+                time.sleep(5)
+
+
+def init_fruit_cache(app):
+    app.config.setdefault('FRUIT_CACHE_ENABLED', True)
+    app.config.setdefault('FRUIT_CACHE_LOCAL_SIZE', 1024)
+    app.config.setdefault('FRUIT_CACHE_LOCAL_TTL', 5)
+    app.config.setdefault('FRUIT_CACHE_REDIS_TTL', 300)
+    if app.config['FRUIT_CACHE_ENABLED']:
+        app.extensions['fruit_cache'] = FruitCache(app)
+
+
+def get_fruit_cache():
+    return current_app.extensions.get('fruit_cache')
@@ -0,0 +1,729 @@
+# ==============================================================================
+# 文件名: fruit_routes.py
+# 功能: 果蔬管理蓝图
+# 描述:
+#   1. 列表分页、详情、模糊搜索
+#   2. 添加、修改（乐观锁）、删除
+#   3. 批量修改/删除
+#   4. 价格历史查询
+#   所有查询和写入都限定在当前店铺 g.shop_id（见 tenancy.py），其他店铺的品种按不存在处理
+# ==============================================================================
+
+from flask import Blueprint, Response, request, g, abort
+from sqlalchemy import or_, func, select, update, insert, delete, exists, bindparam, Float
+from sqlalchemy.orm.exc import StaleDataError
+from datetime import timedelta, datetime, timezone
+from collections import Counter
+from models import db, FruitVariety, Details, PriceHistory
+from projections import get_fruit, paginate_fruits, parse_fields
+from audit import record_change, record_update, row_values
+from changefeed import publish_changes, read_since, sse_events, valid_seq
+from extensions import get_redis
+from fruit_cache import get_fruit_cache
+from idempotency import idempotent, refresh_in_flight
+from utils import success, error
+
+fruits_bp = Blueprint('fruits', __name__)
+
+
+# 写操作提交后的统一收尾：整批只做一次缓存失效和一次变更事件发布
+def after_fruit_write(events:list):
+    cache = get_fruit_cache()
+    if cache is not None:
+        cache.invalidate(g.shop_id, [e['id'] for e in events if e['op'] != 'create'])
+    publish_changes(g.shop_id, events, get_redis())
+
+# 果蔬首页——已（未）登录
+@fruits_bp.route('/api/fruits', methods = ['GET'])
+def get_fruits_and_vegetables():
+    per_page = 10 # 每一页10条信息
+    # 页码信息
+    page = request.args.get('page',1 , type=int)
+    # 稀疏字段，如 ?fields=id,name,detail.price_per_kg
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return error(f'不支持的字段: {e}', 400)
+    # 分页查询，只读投影，不加载 ORM 对象
+    rows, pagination = paginate_fruits(g.shop_id, page, per_page, fields=fields)
+    # 转字典
+    fruits = [f.to_dict(fields) for f in rows]
+    return success({
+        'fruits': fruits,
+        'total': pagination['total'],  # 总记录数
+        'pages': pagination['pages'],  # 总页数
+        'current_page': page,  # 当前页码
+        'has_next': pagination['has_next'],   # 是否有下一页（True/False）
+        'has_prev': pagination['has_prev']    # 是否有上一页
+    })
+
+
+# 果蔬详情页
+@fruits_bp.route('/api/fruits/<int:fruit_id>', methods = ['GET'])
+def fruit_details(fruit_id):
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+    # 两级缓存：本地 LRU → Redis → 数据库
+    cache = get_fruit_cache()
+    if cache is not None:
+        data = cache.get(g.shop_id, fruit_id)
+    else:
+        fruit = get_fruit(g.shop_id, fruit_id)
+        data = fruit.to_dict() if fruit else None
+    if data is None:
+        abort(404)
+    response = success(data)
+    # 返回版本号作为 ETag，修改时通过 If-Match 带回实现乐观锁
+    response.headers['ETag'] = fruit_etag(data['version'], data['detail']['version'] if data['detail'] else 0)
+    return response
+
+
+# 变更流
+"""
+?since=<seq>：追赶模式，返回 seq 之后的变更（JSON，最多 limit 条），truncated 为 true 时需重新全量拉取
+不带 since：SSE 长连接推送新变更，断线重连时从 Last-Event-ID 续传；收到 truncated 事件时需重新全量拉取
+"""
+@fruits_bp.route('/api/fruits/changes', methods = ['GET'])
+def fruit_changes():
+    redis_client = get_redis()
+    if redis_client is None:
+        return error('变更流暂不可用', 503)
+    since = request.args.get('since')
+    if since is not None:
+        if not valid_seq(since):
+            return error('since 格式错误', 400)
+        limit = min(max(request.args.get('limit', 1000, type=int), 1), 1000)
+        try:
+            changes, truncated = read_since(g.shop_id, since, limit, redis_client)
+        except Exception as e:
+            print(f"[Error] 变更流读取失败: {e}")
+            return error('变更流暂不可用', 503)
+        return success({
+            'changes': changes,
+            'last_seq': changes[-1]['seq'] if changes else since,
+            'truncated': truncated
+        })
+
+    last_seq = request.headers.get('Last-Event-ID') or '$'
+    if last_seq != '$' and not valid_seq(last_seq):
+        return error('Last-Event-ID 格式错误', 400)
+    return Response(sse_events(g.shop_id, last_seq, redis_client), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'   # 关闭 Nginx 缓冲，事件立即推送
+    })
+
+
+# 根据果蔬名称模糊查询功能
+@fruits_bp.route('/api/search', methods = ['GET'])
+def search():
+    # 从前端获取要查询的果蔬名称关键词
+    q = request.args.get('q','').strip()
+    page = request.args.get('page',1,type=int)
+    per_page = request.args.get('per_page',10,type = int)
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return error(f'不支持的字段: {e}', 400)
+
+    if not q:
+        return success({
+            'results': [],
+            'current_page':page,
+            'pages':0,
+            'total':0,
+            'has_next': False,   
+            'has_prev': False 
+            })
+    condition = or_(
+        FruitVariety.name.like(f"%{q}%"),
+        FruitVariety.category.like(f"%{q}%")
+    )
+    # 对搜索出来的结果进行分页
+    rows, pagination = paginate_fruits(g.shop_id, page, per_page, where=condition, fields=fields)
+    return success({
+        'results':[r.to_dict(fields) for r in rows],
+        'current_page':page,
+        'pages':pagination['pages'],
+        'total':pagination['total'],
+        'has_next': pagination['has_next'],
+        'has_prev': pagination['has_prev']
+        })
+
+# 种类添加功能
+@fruits_bp.route('/api/fruits', methods = ['POST'])
+@idempotent
+def add_fruits():
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+
+    data = request.get_json()
+    category = data.get('category')
+    name = data.get('name')
+    detail_data = data.get('detail',{})
+
+    if not category or not name:
+        return error("大类和品种名不能为空")
+    try:
+        new_fruit = FruitVariety(shop_id = g.shop_id, category = category, name = name)
+        db.session.add(new_fruit)
+        db.session.flush() # 获取ID
+
+        detail = Details(
+            shop_id=g.shop_id,
+            variety_id=new_fruit.id,
+            origin=detail_data.get('origin'),
+            introduction=detail_data.get('introduction'),
+            price_per_kg=detail_data.get('price_per_kg')
+
+        )
+        
+        db.session.add(detail)
+        # 初始单价也记入价格历史，与品种在同一事务中提交
+        if detail.price_per_kg is not None:
+            db.session.add(PriceHistory(shop_id=g.shop_id, variety_id=new_fruit.id, price_per_kg=detail.price_per_kg))
+        db.session.commit()
+        data = new_fruit.to_dict()
+        after_fruit_write([{'op': 'create', 'id': new_fruit.id, 'data': data}])
+        return success(data,'添加成功')
+    except Exception as e:
+        db.session.rollback()
+        return error(message='种类添加失败，请重试', code=500)
+
+# 种类删除功能
+@fruits_bp.route('/api/fruits/<int:fruit_id>', methods = ['DELETE'])
+def delete_fruit(fruit_id):
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+    fruit = FruitVariety.query.filter_by(shop_id=g.shop_id, id=fruit_id).first_or_404()
+    try:
+        if fruit.detail:
+            db.session.delete(fruit.detail) # 删除从表信息
+        db.session.delete(fruit)    # 删除主表信息
+        db.session.commit()
+        after_fruit_write([{'op': 'delete', 'id': fruit_id}])
+        return success()
+    except Exception as e:
+        db.session.rollback() # 撤销工作台里所有未提交的操作，恢复到操作前的状态
+        return error(message=f'品种删除失败',code = 500)
+
+
+# 乐观锁工具函数
+"""
+ETag 格式为 "品种版本-详情版本"，没有详情时详情版本记为 0
+If-Match 缺省或为 * 时不做版本检查，返回 None
+无法解析时返回 False，按版本不匹配处理
+"""
+DETAIL_FIELDS = ('origin', 'introduction', 'price_per_kg')
+
+def fruit_etag(fruit_version:int, detail_version:int)->str:
+    return f'"{fruit_version}-{detail_version}"'
+
+def parse_if_match():
+    header = request.headers.get('If-Match')
+    if not header or header.strip() == '*':
+        return None
+    tag = header.split(',')[0].strip()
+    if tag.startswith('W/'):
+        tag = tag[2:]
+    try:
+        fruit_version, detail_version = tag.strip('"').split('-')
+        return int(fruit_version), int(detail_version)
+    except ValueError:
+        return False
+
+
+# 字段值校验：类型、长度、非空与数据库列定义一致，单条修改和批量接口共用
+def _valid_text(value, column, allow_empty:bool = True)->bool:
+    if not isinstance(value, str) or (not allow_empty and not value):
+        return False
+    return column.type.length is None or len(value) <= column.type.length
+
+def _valid_price(value)->bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value < float('inf')
+
+def valid_detail_values(detail_data:dict)->bool:
+    for key in ('origin', 'introduction'):
+        if key in detail_data and not _valid_text(detail_data[key], Details.__table__.c[key]):
+            return False
+    return 'price_per_kg' not in detail_data or _valid_price(detail_data['price_per_kg'])
+
+
+# 价格历史：单价确实变化时才记录
+"""
+INSERT ... SELECT 从 details 表直接生成历史行，新单价与当前单价相同的行不会被选中，不需要先读旧值
+必须在 UPDATE details 之前、同一事务中执行；参数 h_shop、h_id、h_price，可 executemany
+"""
+PRICE_CHANGE_HISTORY = insert(PriceHistory.__table__).from_select(
+    ['shop_id', 'variety_id', 'price_per_kg'],
+    select(Details.shop_id, Details.variety_id, bindparam('h_price', type_=Float)).where(
+        Details.shop_id == bindparam('h_shop'),
+        Details.variety_id == bindparam('h_id'),
+        Details.price_per_kg.is_distinct_from(bindparam('h_price', type_=Float))
+    )
+)
+
+
+def current_etag(fruit_id:int)->str:
+    versions = db.session.execute(
+        select(FruitVariety.version, Details.version)
+        .outerjoin(Details, Details.variety_id == FruitVariety.id)
+        .where(FruitVariety.shop_id == g.shop_id, FruitVariety.id == fruit_id)
+    ).one()
+    return fruit_etag(versions[0], versions[1] or 0)
+
+
+# 种类内容修改功能
+@fruits_bp.route('/api/fruits/<int:fruit_id>',methods = ['PATCH'])
+def change_detail(fruit_id):
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+    data = request.get_json()
+    if not data:
+        return error('请求数据不能为空', 400)
+    expected = parse_if_match()
+    if expected is False:
+        return error('数据已被他人修改，请刷新后重试', 412)
+
+    detail_data = data.get('detail')
+    if detail_data is not None and (not isinstance(detail_data, dict) or not valid_detail_values(detail_data)):
+        return error('详情字段格式错误', 400)
+
+    # 快速路径：只修改详情字段时，用 Core 语句完成，不加载 ORM 对象
+    # 审计需要旧值，先按 (shop_id, variety_id) 加锁读取详情这一行；没有详情时直接走完整流程补建
+    # 版本检查放进 UPDATE 的 WHERE 条件，影响行数为 0 时再走下面的完整流程判断原因（404/412）
+    old_detail = None
+    if set(data) == {'detail'} and isinstance(detail_data, dict) and detail_data \
+            and set(detail_data) <= set(DETAIL_FIELDS):
+        old_detail = db.session.execute(
+            select(Details.__table__)
+            .where(Details.shop_id == g.shop_id, Details.variety_id == fruit_id)
+            .with_for_update()
+        ).first()
+    if old_detail is not None:
+        stmt = (
+            update(Details)
+            .where(Details.shop_id == g.shop_id, Details.variety_id == fruit_id)
+            .values(**detail_data, version=Details.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if expected:
+            stmt = stmt.where(
+                Details.version == expected[1],
+                exists().where(FruitVariety.id == fruit_id, FruitVariety.version == expected[0])
+            )
+        try:
+            # 先按旧单价判断是否记历史；若下面的 UPDATE 没有命中，整个事务回滚，历史也不会留下
+            if 'price_per_kg' in detail_data:
+                db.session.execute(PRICE_CHANGE_HISTORY, {
+                    'h_shop': g.shop_id, 'h_id': fruit_id, 'h_price': detail_data['price_per_kg']})
+            result = db.session.execute(stmt)
+            if result.rowcount == 1:
+                record_update(Details.__tablename__, row_values(old_detail), detail_data)
+                etag = fruit_etag(expected[0], expected[1] + 1) if expected else current_etag(fruit_id)
+                db.session.commit()
+                after_fruit_write([{'op': 'update', 'id': fruit_id, 'data': {'detail': detail_data}}])
+                response = success(message='信息修改成功')
+                response.headers['ETag'] = etag
+                return response
+            db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
+            return error(message=f'信息修改失败：{str(e)}', code=500)
+
+    fruit = FruitVariety.query.filter_by(shop_id=g.shop_id, id=fruit_id).first_or_404()
+    if expected and expected != (fruit.version, fruit.detail.version if fruit.detail else 0):
+        response, code = error('数据已被他人修改，请刷新后重试', 412)
+        response.headers['ETag'] = fruit_etag(fruit.version, fruit.detail.version if fruit.detail else 0)
+        return response, code
+
+    # 主信息部分修改
+    if 'category' in data:
+        fruit.category = data['category']
+    if 'name' in data:
+        fruit.name = data['name']
+
+    # 详情信息部分修改
+    detail_data = data.get('detail')
+    # 检查用户是否传入详情信息
+    if detail_data is not None:
+        # 如果本来的果蔬种类fruit有对应的详情信息，要做的是更改
+        if fruit.detail:
+                # 单价发生变化时追加一条价格历史，随本次修改一起提交
+                if 'price_per_kg' in detail_data and detail_data['price_per_kg'] != fruit.detail.price_per_kg:
+                    db.session.add(PriceHistory(shop_id=g.shop_id, variety_id=fruit.id, price_per_kg=detail_data['price_per_kg']))
+                for key in DETAIL_FIELDS:
+                    if key in detail_data:
+                        setattr(fruit.detail, key, detail_data[key])
+        else:   # 如果没有，就按照用户上传的信息创建
+            fruit.detail = Details(
+            shop_id=g.shop_id,
+            variety_id=fruit.id,
+            origin=detail_data.get('origin'),
+            introduction=detail_data.get('introduction'),
+            price_per_kg=detail_data.get('price_per_kg')
+            )
+            db.session.add(fruit.detail)
+            if fruit.detail.price_per_kg is not None:
+                db.session.add(PriceHistory(shop_id=g.shop_id, variety_id=fruit.id, price_per_kg=fruit.detail.price_per_kg))
+    
+    try:
+        db.session.commit()
+        after_fruit_write([{
+            'op': 'update', 'id': fruit_id,
+            'data': {k: data[k] for k in ('category', 'name', 'detail') if k in data}
+        }])
+        response = success(message='信息修改成功')
+        response.headers['ETag'] = fruit_etag(fruit.version, fruit.detail.version if fruit.detail else 0)
+        return response
+    except StaleDataError:
+        # 提交时 UPDATE ... WHERE version = 旧值 没有命中，说明期间被其他请求修改
+        db.session.rollback()
+        return error('数据已被他人修改，请刷新后重试', 412)
+    except Exception as e:
+        db.session.rollback()
+        return error(message=f'信息修改失败：{str(e)}', code=500)
+
+
+# 批量维护工具
+"""
+批量接口按 BULK_CHUNK_SIZE 分块，每块一个事务
+块内用 WHERE id IN 一次查出存在的 id，再按字段组合分组 executemany，
+不逐条加载 ORM 对象；提交前先逐条校验值的类型、长度和非空，不合法的条目标记为 invalid
+某一块仍然失败时回滚该块并二分重试，直到定位出失败的条目，返回每个 id 真实的处理结果
+"""
+BULK_CHUNK_SIZE = 500
+BULK_MAX_ITEMS = 10000
+
+def chunked(items:list, size:int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def validate_bulk_item(item)->bool:
+    if not isinstance(item, dict) or not isinstance(item.get('id'), int) or isinstance(item['id'], bool):
+        return False
+    if not set(item) <= {'id', 'category', 'name', 'detail'}:
+        return False
+    for key in ('category', 'name'):
+        if key in item and not _valid_text(item[key], FruitVariety.__table__.c[key], allow_empty=False):
+            return False
+    detail_data = item.get('detail')
+    if detail_data is not None:
+        if not isinstance(detail_data, dict) or not set(detail_data) <= set(DETAIL_FIELDS):
+            return False
+        if not valid_detail_values(detail_data):
+            return False
+    return len(set(item) - {'id'}) > 0
+
+def bulk_response(results:list):
+    return success({
+        'results': results,
+        'summary': dict(Counter(r['status'] for r in results))
+    })
+
+
+# 查出一块品种修改/删除前的值，供审计日志的 before 使用
+"""
+每块固定两条 WHERE id IN 查询（品种、详情），返回 {id: {...品种字段, 'detail': {...详情字段} 或 None}}
+品种和详情的字段都是平铺的整行（row_values），不在返回结果中的 id 即不存在
+"""
+def load_bulk_rows(shop_id:int, ids:list)->dict:
+    rows = {
+        row.id: {**row_values(row), 'detail': None}
+        for row in db.session.execute(
+            select(FruitVariety.__table__).where(FruitVariety.shop_id == shop_id, FruitVariety.id.in_(ids)))
+    }
+    for row in db.session.execute(
+            select(Details.__table__).where(Details.shop_id == shop_id, Details.variety_id.in_(ids))):
+        if row.variety_id in rows:
+            rows[row.variety_id]['detail'] = row_values(row)
+    return rows
+
+
+# 在一个事务中执行一块批量修改，失败时二分重试
+"""
+chunk 为 [(输入顺序, item)]，返回 ({输入顺序: 结果}, 变更事件列表)
+只有单条仍失败时才标记为 error，其余条目照常提交
+"""
+def run_bulk_update(chunk:list, shop_id:int):
+    refresh_in_flight()
+    try:
+        outcomes, events = apply_bulk_update(chunk, shop_id)
+        db.session.commit()
+        return outcomes, events
+    except Exception as e:
+        db.session.rollback()
+        if len(chunk) == 1:
+            index, item = chunk[0]
+            print(f"[Error] 批量修改失败 id={item['id']}: {e}")
+            return {index: {'id': item['id'], 'status': 'error'}}, []
+    middle = len(chunk) // 2
+    outcomes, events = run_bulk_update(chunk[:middle], shop_id)
+    right_outcomes, right_events = run_bulk_update(chunk[middle:], shop_id)
+    outcomes.update(right_outcomes)
+    return outcomes, events + right_events
+
+
+# 执行一块批量修改的全部语句，不提交
+def apply_bulk_update(chunk:list, shop_id:int):
+    fruit_table = FruitVariety.__table__
+    detail_table = Details.__table__
+    outcomes, events = {}, []
+    current = load_bulk_rows(shop_id, [item['id'] for _, item in chunk])
+
+    # 按修改的字段组合分组，同一组共用一条 UPDATE 语句 executemany
+    fruit_groups, detail_groups = {}, {}
+    new_details, history, price_changes = [], [], []
+    for index, item in chunk:
+        fruit_id = item['id']
+        row = current.get(fruit_id)
+        if row is None:
+            outcomes[index] = {'id': fruit_id, 'status': 'not_found'}
+            continue
+        detail_data = item.get('detail')
+        old_detail = row['detail']
+        # 品种还没有详情时会新建，详情表的列都不能为空
+        if detail_data and old_detail is None and not set(DETAIL_FIELDS) <= set(detail_data):
+            outcomes[index] = {'id': fruit_id, 'status': 'invalid'}
+            continue
+        fruit_values = {k: item[k] for k in ('category', 'name') if k in item}
+        if fruit_values:
+            fruit_groups.setdefault(tuple(sorted(fruit_values)), []).append(
+                {'b_id': fruit_id, **{f'v_{k}': v for k, v in fruit_values.items()}})
+        if detail_data:
+            if old_detail is not None:
+                detail_groups.setdefault(tuple(sorted(detail_data)), []).append(
+                    {'b_id': fruit_id, **{f'v_{k}': v for k, v in detail_data.items()}})
+                if 'price_per_kg' in detail_data:
+                    price_changes.append({'h_shop': shop_id, 'h_id': fruit_id, 'h_price': detail_data['price_per_kg']})
+            else:
+                new_details.append({'shop_id': shop_id, 'variety_id': fruit_id,
+                                    **{k: detail_data[k] for k in DETAIL_FIELDS}})
+                history.append({'shop_id': shop_id, 'variety_id': fruit_id, 'price_per_kg': detail_data['price_per_kg']})
+        # 审计按表分别登记，格式与 ORM 监听器一致；新建的详情在插入后再登记
+        record_update(FruitVariety.__tablename__, row, fruit_values)
+        if detail_data and old_detail is not None:
+            record_update(Details.__tablename__, old_detail, detail_data)
+        changes = {k: v for k, v in item.items() if k != 'id'}
+        events.append({'op': 'update', 'id': fruit_id, 'data': changes})
+        outcomes[index] = {'id': fruit_id, 'status': 'updated'}
+
+    for keys, rows in fruit_groups.items():
+        db.session.execute(
+            update(fruit_table)
+            .where(fruit_table.c.shop_id == shop_id, fruit_table.c.id == bindparam('b_id'))
+            .values(**{k: bindparam(f'v_{k}') for k in keys}, version=fruit_table.c.version + 1),
+            rows
+        )
+    # 价格历史要在 UPDATE details 之前按旧单价比较
+    if price_changes:
+        db.session.execute(PRICE_CHANGE_HISTORY, price_changes)
+    for keys, rows in detail_groups.items():
+        db.session.execute(
+            update(detail_table)
+            .where(detail_table.c.shop_id == shop_id, detail_table.c.variety_id == bindparam('b_id'))
+            .values(**{k: bindparam(f'v_{k}') for k in keys}, version=detail_table.c.version + 1),
+            rows
+        )
+    if new_details:
+        db.session.execute(insert(detail_table), new_details)
+        # executemany 拿不到自增 id，按 variety_id 查回新行用于审计
+        for row in db.session.execute(select(detail_table).where(
+                detail_table.c.shop_id == shop_id,
+                detail_table.c.variety_id.in_([d['variety_id'] for d in new_details]))):
+            record_change(Details.__tablename__, row.id, 'insert', row_values(row))
+    if history:
+        db.session.execute(insert(PriceHistory.__table__), history)
+    return outcomes, events
+
+
+# 批量修改功能
+@fruits_bp.route('/api/fruits/bulk', methods = ['PATCH'])
+@idempotent
+def bulk_change_details():
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return error('items 不能为空', 400)
+    if len(items) > BULK_MAX_ITEMS:
+        return error(f'单次最多处理 {BULK_MAX_ITEMS} 条', 400)
+
+    outcomes = {}   # 输入顺序 -> 结果
+    valid = []
+    seen = set()
+    for index, item in enumerate(items):
+        if not validate_bulk_item(item):
+            outcomes[index] = {'id': item.get('id') if isinstance(item, dict) else None, 'status': 'invalid'}
+        elif item['id'] in seen:
+            outcomes[index] = {'id': item['id'], 'status': 'duplicate'}
+        else:
+            seen.add(item['id'])
+            valid.append((index, item))
+
+    events = []
+    for chunk in chunked(valid, BULK_CHUNK_SIZE):
+        chunk_outcomes, chunk_events = run_bulk_update(chunk, g.shop_id)
+        outcomes.update(chunk_outcomes)
+        events.extend(chunk_events)
+
+    # 整批处理完后统一发布一次
+    after_fruit_write(events)
+    return bulk_response([outcomes[i] for i in range(len(items))])
+
+
+# 批量删除功能
+@fruits_bp.route('/api/fruits/bulk', methods = ['DELETE'])
+@idempotent
+def bulk_delete_fruits():
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return error('ids 不能为空', 400)
+    if len(ids) > BULK_MAX_ITEMS:
+        return error(f'单次最多处理 {BULK_MAX_ITEMS} 条', 400)
+
+    outcomes = {}   # 输入顺序 -> 结果
+    valid = []
+    seen = set()
+    for index, fruit_id in enumerate(ids):
+        if not isinstance(fruit_id, int) or isinstance(fruit_id, bool):
+            outcomes[index] = {'id': fruit_id, 'status': 'invalid'}
+        elif fruit_id in seen:
+            outcomes[index] = {'id': fruit_id, 'status': 'duplicate'}
+        else:
+            seen.add(fruit_id)
+            valid.append((index, fruit_id))
+
+    events = []
+    for chunk in chunked(valid, BULK_CHUNK_SIZE):
+        chunk_ids = [fruit_id for _, fruit_id in chunk]
+        refresh_in_flight()
+        try:
+            existing = load_bulk_rows(g.shop_id, chunk_ids)
+            if existing:
+                # 先删从表再删主表；价格历史保留
+                db.session.execute(delete(Details.__table__).where(
+                    Details.shop_id == g.shop_id, Details.variety_id.in_(list(existing))))
+                db.session.execute(delete(FruitVariety.__table__).where(
+                    FruitVariety.shop_id == g.shop_id, FruitVariety.id.in_(list(existing))))
+                # 与单条删除一致：详情、品种各登记一条，before 为该行的平铺字段
+                for fruit_id, before in existing.items():
+                    old_detail = before.pop('detail')
+                    if old_detail is not None:
+                        record_change(Details.__tablename__, old_detail['id'], 'delete', before=old_detail)
+                    record_change(FruitVariety.__tablename__, fruit_id, 'delete', before=before)
+            db.session.commit()
+            events.extend({'op': 'delete', 'id': fruit_id} for fruit_id in chunk_ids if fruit_id in existing)
+            for index, fruit_id in chunk:
+                outcomes[index] = {'id': fruit_id, 'status': 'deleted' if fruit_id in existing else 'not_found'}
+        except Exception as e:
+            db.session.rollback()
+            print(f"[Error] 批量删除失败: {e}")
+            for index, fruit_id in chunk:
+                outcomes[index] = {'id': fruit_id, 'status': 'error'}
+
+    after_fruit_write(events)
+    return bulk_response([outcomes[i] for i in range(len(ids))])
+
+
+# 价格历史的时间分桶表达式，按数据库方言在 SQL 中完成降采样
+PRICE_BUCKETS = ('hour', 'day', 'month')
+
+def price_bucket_expr(bucket:str):
+    col = PriceHistory.changed_at
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return func.date_trunc(bucket, col)
+    formats = {
+        'hour': '%Y-%m-%d %H:00:00',
+        'day': '%Y-%m-%d',
+        'month': '%Y-%m-01'
+    }
+    if dialect == 'sqlite':
+        return func.strftime(formats[bucket], col)
+    # MySQL
+    return func.date_format(col, formats[bucket])
+
+
+# 解析 ISO 时间，统一转成不带时区的 UTC（与 changed_at 的存储方式一致）
+# 带时区（如 Z、+08:00）时先换算到 UTC；不带时区的按 UTC 处理
+def parse_utc(value:str)->datetime:
+    if value.endswith(('Z', 'z')):
+        value = value[:-1] + '+00:00'
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+# 价格历史查询功能
+"""
+from/to 为 ISO 时间（可带时区，统一换算为 UTC），默认最近 30 天
+不传 bucket 返回原始记录（最多 1000 条）
+bucket=hour/day/month 时在数据库中分组聚合，返回每个时间桶的最低/最高/平均价
+"""
+@fruits_bp.route('/api/fruits/<int:fruit_id>/prices', methods = ['GET'])
+def fruit_prices(fruit_id):
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+    try:
+        end = parse_utc(request.args['to']) if request.args.get('to') else datetime.utcnow()
+        start = parse_utc(request.args['from']) if request.args.get('from') else end - timedelta(days=30)
+    except ValueError:
+        return error('时间格式错误，请使用 ISO 格式，如 2026-01-01 或 2026-01-01T08:00:00', 400)
+    if start > end:
+        return error('起始时间不能晚于结束时间', 400)
+    bucket = request.args.get('bucket')
+    if bucket and bucket not in PRICE_BUCKETS:
+        return error(f"bucket 仅支持 {'/'.join(PRICE_BUCKETS)}", 400)
+
+    # 条件顺序与 (shop_id, variety_id, changed_at) 索引一致，走索引范围扫描
+    conditions = (
+        PriceHistory.shop_id == g.shop_id,
+        PriceHistory.variety_id == fruit_id,
+        PriceHistory.changed_at >= start,
+        PriceHistory.changed_at <= end
+    )
+    if not bucket:
+        rows = db.session.execute(
+            select(PriceHistory.price_per_kg, PriceHistory.changed_at)
+            .where(*conditions)
+            .order_by(PriceHistory.changed_at)
+            .limit(1000)
+        ).all()
+        points = [{
+            'price_per_kg': r.price_per_kg,
+            'changed_at': r.changed_at.isoformat()
+        } for r in rows]
+    else:
+        bucket_col = price_bucket_expr(bucket).label('bucket')
+        rows = db.session.execute(
+            select(
+                bucket_col,
+                func.min(PriceHistory.price_per_kg).label('min_price'),
+                func.max(PriceHistory.price_per_kg).label('max_price'),
+                func.avg(PriceHistory.price_per_kg).label('avg_price'),
+                func.count().label('changes')
+            )
+            .where(*conditions)
+            .group_by(bucket_col)
+            .order_by(bucket_col)
+        ).all()
+        points = [{
+            'bucket': r.bucket.isoformat() if isinstance(r.bucket, datetime) else r.bucket,
+            'min_price': r.min_price,
+            'max_price': r.max_price,
+            'avg_price': round(float(r.avg_price), 2) if r.avg_price is not None else None,
+            'changes': r.changes
+        } for r in rows]
+
+    return success({
+        'variety_id': fruit_id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'bucket': bucket,
+        'points': points
+    })
@@ -0,0 +1,126 @@
+# ==============================================================================
+# 文件名: idempotency.py
+# 功能: 写接口幂等键
+# 描述:
+#   客户端超时重试时携带相同的 Idempotency-Key 请求头，服务端只执行一次：
+#   1. 首次请求用 SET NX 写入“处理中”标记（短过期时间，相当于一把锁），然后执行视图
+#   2. 执行完成后把状态码和响应体存入 Redis（24 小时），重试时直接返回存储的结果
+#   3. 同一个 key 的请求体（指纹）不同返回 422；仍在处理中返回 409
+#   5xx 结果不保存，允许客户端重试；Redis 不可用时不做幂等保护，正常执行
+#   4. 耗时较长的视图（批量接口）在处理过程中调用 refresh_in_flight 续期处理中标记，
+#      避免标记过期后客户端重试与正在执行的请求同时运行
+# ==============================================================================
+
+from flask import request, g, make_response
+from functools import wraps
+import hashlib
+import json
+import time
+from extensions import get_redis
+from utils import error
+
+IDEMPOTENCY_TTL = 24 * 3600    # 结果保存时间
+IN_FLIGHT_TTL = 30             # 处理中标记的过期时间，防止进程崩溃后 key 永久锁死
+REFRESH_INTERVAL = IN_FLIGHT_TTL / 3   # 续期的最小间隔（秒）
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint()->str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def _redis_key(key:str)->str:
+    user = g.get('current_user')
+    owner = user.id if user is not None else 'anonymous'
+    return f"idem:{g.shop_id}:{owner}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def _replay(record:dict):
+    response = make_response(record['body'], record['status'])
+    response.mimetype = 'application/json'
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+# 续期当前请求的处理中标记
+"""
+供批量接口在分块之间调用；请求未携带 Idempotency-Key 或 Redis 不可用时什么也不做
+距上次续期不足 REFRESH_INTERVAL 秒时直接返回，二分重试时频繁调用也不会每次访问 Redis
+标记已不是本请求写入的（已过期被其他请求占用）时不续期
+"""
+def refresh_in_flight():
+    state = g.get('idempotency')
+    if state is None or time.monotonic() - state['refreshed_at'] < REFRESH_INTERVAL:
+        return
+    state['refreshed_at'] = time.monotonic()
+    try:
+        if state['redis'].get(state['key']) == state['marker']:
+            state['redis'].expire(state['key'], IN_FLIGHT_TTL)
+    except Exception as e:
+        print(f"[Warning] 幂等处理中标记续期失败: {e}")
+
+
+# 幂等装饰器，放在路由装饰器之下
+def idempotent(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return error(f'Idempotency-Key 长度不能超过 {MAX_KEY_LENGTH}', 400)
+        redis_client = get_redis()
+        if redis_client is None:
+            print("[Warning] Redis 不可用，本次请求不做幂等保护")
+            return view(*args, **kwargs)
+
+        redis_key = _redis_key(key)
+        fingerprint = _fingerprint()
+        marker = json.dumps({'state': 'in_flight', 'fp': fingerprint})
+        try:
+            acquired = redis_client.set(redis_key, marker, nx=True, ex=IN_FLIGHT_TTL)
+            if not acquired:
+                stored = redis_client.get(redis_key)
+                record = json.loads(stored) if stored else None
+                if record is None:
+                    # 处理中标记恰好过期，让客户端稍后重试
+                    response, code = error('相同请求正在处理中，请稍后重试', 409)
+                    response.headers['Retry-After'] = '1'
+                    return response, code
+                if record['fp'] != fingerprint:
+                    return error('Idempotency-Key 已用于不同的请求', 422)
+                if record['state'] == 'in_flight':
+                    response, code = error('相同请求正在处理中，请稍后重试', 409)
+                    response.headers['Retry-After'] = '1'
+                    return response, code
+                return _replay(record)
+        except Exception as e:
+            print(f"[Warning] 幂等键读写失败，本次请求不做幂等保护: {e}")
+            return view(*args, **kwargs)
+
+        g.idempotency = {'redis': redis_client, 'key': redis_key, 'marker': marker, 'refreshed_at': time.monotonic()}
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            redis_client.delete(redis_key)
+            raise
+
+        try:
+            if response.status_code >= 500:
+                # 服务端错误不缓存，释放 key 让客户端重试
+                redis_client.delete(redis_key)
+            else:
+                redis_client.set(redis_key, json.dumps({
+                    'state': 'done',
+                    'fp': fingerprint,
+                    'status': response.status_code,
+                    'body': response.get_data(as_text=True)
+                }), ex=IDEMPOTENCY_TTL)
+        except Exception as e:
+            print(f"[Warning] 幂等结果保存失败: {e}")
+        return response
+    return wrapper
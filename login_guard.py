@@ -0,0 +1,166 @@
+# ==============================================================================
+# 文件名: login_guard.py
+# 功能: 登录防爆破工具模块
+# 描述:
+#   1. 按账号、按 IP 统计登录失败次数（Redis 计数器 + 过期时间，管道一次往返）
+#   2. 超过免费次数后逐次加倍锁定时间（1s, 2s, 4s ... 最长 15 分钟）
+#   3. 锁定检查在查库和密码哈希校验之前完成，被锁定的请求不消耗 CPU
+#   4. 账号不存在时用固定的假哈希做一次校验，耗时与真实账号一致
+#   Redis 不可用时退化为进程内计数（有上限的 TTL 字典，规则相同），降级期间限制仍然有效；
+#   进程内计数只在当前 worker 生效，多 worker 时实际允许的次数按 worker 数放大
+# ==============================================================================
+
+from typing import TYPE_CHECKING
+from collections import OrderedDict
+from functools import lru_cache
+from werkzeug.security import generate_password_hash
+import math
+import secrets
+import threading
+import time
+
+if TYPE_CHECKING:   # 仅用于类型标注
+    from redis import Redis
+
+FAIL_WINDOW = 15 * 60          # 失败计数的统计窗口（秒）
+ACCOUNT_FREE_ATTEMPTS = 5      # 单账号允许的连续失败次数
+IP_FREE_ATTEMPTS = 20          # 单 IP 允许的失败次数（可能对应多个账号）
+MAX_LOCK_SECONDS = 15 * 60     # 最长锁定时间
+LOCAL_MAX_KEYS = 10000         # 进程内计数最多保留的账号/IP 数
+
+
+# 假密码哈希，首次用到时生成，避免拖慢启动
+@lru_cache(maxsize=1)
+def dummy_password_hash()->str:
+    return generate_password_hash(secrets.token_hex(16))
+
+
+def _keys(account:str, ip:str)->dict:
+    return {
+        'account_fail': f'login_fail:acct:{account}',
+        'ip_fail': f'login_fail:ip:{ip}',
+        'account_lock': f'login_lock:acct:{account}',
+        'ip_lock': f'login_lock:ip:{ip}'
+    }
+
+
+# 失败次数超过免费次数后，锁定时间逐次加倍
+def backoff_seconds(failures:int, free_attempts:int)->int:
+    if failures < free_attempts:
+        return 0
+    return min(2 ** (failures - free_attempts), MAX_LOCK_SECONDS)
+
+
+# 进程内失败计数，Redis 不可用时使用
+"""
+key 与 Redis 的计数 key 相同，值为 [失败次数, 计数过期时间, 锁定截止时间]
+超过 max_size 时淘汰最久未更新的 key，内存有界
+"""
+class LocalFailureCounter:
+    def __init__(self, max_size:int):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, key:str, now:float):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] <= now and entry[2] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    # 剩余锁定秒数
+    def locked_for(self, key:str)->int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(key, now)
+            return math.ceil(entry[2] - now) if entry is not None and entry[2] > now else 0
+
+    # 失败次数 +1，返回本次触发的锁定秒数
+    def fail(self, key:str, free_attempts:int)->int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(key, now)
+            if entry is None or entry[1] <= now:
+                entry = [0, 0.0, entry[2] if entry else 0.0]
+            entry[0] += 1
+            entry[1] = now + FAIL_WINDOW
+            lock = backoff_seconds(entry[0], free_attempts)
+            if lock:
+                entry[2] = now + lock
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+            return lock
+
+    def reset(self, key:str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+_local_counter = LocalFailureCounter(LOCAL_MAX_KEYS)
+
+
+# 检查是否处于锁定期
+"""
+返回还需等待的秒数，0 表示允许尝试登录
+"""
+def check_login_allowed(account:str, ip:str, redis_client:'Redis')->int:
+    keys = _keys(account, ip)
+    if not redis_client:
+        return max(_local_counter.locked_for(keys['account_fail']), _local_counter.locked_for(keys['ip_fail']))
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.ttl(keys['account_lock'])
+        pipe.ttl(keys['ip_lock'])
+        account_ttl, ip_ttl = pipe.execute()
+    except Exception as e:
+        print(f"[Error] Redis 读取登录锁定状态失败，改用进程内计数: {e}")
+        return check_login_allowed(account, ip, None)
+    return max(account_ttl or 0, ip_ttl or 0, 0)
+
+
+# 记录一次登录失败
+"""
+计数 +1 并刷新过期时间；超过免费次数时写入锁定 key
+返回本次触发的锁定秒数
+"""
+def record_login_failure(account:str, ip:str, redis_client:'Redis')->int:
+    keys = _keys(account, ip)
+    if not redis_client:
+        return max(_local_counter.fail(keys['account_fail'], ACCOUNT_FREE_ATTEMPTS),
+                   _local_counter.fail(keys['ip_fail'], IP_FREE_ATTEMPTS))
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.incr(keys['account_fail'])
+        pipe.expire(keys['account_fail'], FAIL_WINDOW)
+        pipe.incr(keys['ip_fail'])
+        pipe.expire(keys['ip_fail'], FAIL_WINDOW)
+        account_failures, _, ip_failures, _ = pipe.execute()
+
+        account_lock = backoff_seconds(account_failures, ACCOUNT_FREE_ATTEMPTS)
+        ip_lock = backoff_seconds(ip_failures, IP_FREE_ATTEMPTS)
+        if account_lock or ip_lock:
+            pipe = redis_client.pipeline(transaction=False)
+            if account_lock:
+                pipe.setex(keys['account_lock'], account_lock, account_failures)
+            if ip_lock:
+                pipe.setex(keys['ip_lock'], ip_lock, ip_failures)
+            pipe.execute()
+        return max(account_lock, ip_lock)
+    except Exception as e:
+        print(f"[Error] Redis 记录登录失败次数失败，改用进程内计数: {e}")
+        return record_login_failure(account, ip, None)
+
+
+# 登录成功后清空该账号的失败记录（IP 计数保留，防止用一个有效账号洗白）
+def record_login_success(account:str, ip:str, redis_client:'Redis'):
+    keys = _keys(account, ip)
+    _local_counter.reset(keys['account_fail'])
+    if not redis_client:
+        return
+    try:
+        redis_client.delete(keys['account_fail'], keys['account_lock'])
+    except Exception as e:
+        print(f"[Warning] 清除登录失败记录失败: {e}")
@@ -0,0 +1,45 @@
+"""price history composite primary key
+
+Revision ID: a1d6e3f08b42
+Revises: e4c81b5f9d27
+Create Date: 2026-10-20 10:12:37.504119
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d6e3f08b42'
+down_revision = 'e4c81b5f9d27'
+branch_labels = None
+depends_on = None
+
+
+# 主键改为 (id, changed_at)，以后可直接按 changed_at 做 RANGE 分区
+# MySQL 的自增列必须始终在某个键中，删除和新建主键要放在同一条 ALTER 里
+# SQLite 重建表，建表语句由 models.py 中的 sqlite_rowid 规则生成（id 仍为 rowid 自增）
+def _set_primary_key(columns:list):
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.execute(f"ALTER TABLE price_history DROP PRIMARY KEY, ADD PRIMARY KEY ({', '.join(columns)})")
+        return
+    if dialect == 'sqlite':
+        # 升级前的主键有名字，可以先删除；升级后 id 是内联的 rowid 主键（无名字），降级时直接替换
+        upgrading = len(columns) > 1
+        table_kwargs = {'info': {'sqlite_rowid': 'id'}} if upgrading else {}
+        with op.batch_alter_table('price_history', schema=None, table_kwargs=table_kwargs) as batch_op:
+            if upgrading:
+                batch_op.drop_constraint('pk_price_history', type_='primary')
+            batch_op.create_primary_key('pk_price_history', columns)
+        return
+    with op.batch_alter_table('price_history', schema=None) as batch_op:
+        batch_op.drop_constraint('pk_price_history', type_='primary')
+        batch_op.create_primary_key('pk_price_history', columns)
+
+
+def upgrade():
+    _set_primary_key(['id', 'changed_at'])
+
+
+def downgrade():
+    _set_primary_key(['id'])
@@ -1,7 +1,10 @@
 # model
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData,Text, Float,ForeignKey
+from sqlalchemy import MetaData,Text, Float,ForeignKey, Index, UniqueConstraint, PrimaryKeyConstraint
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
 from datetime import datetime
+from typing import Optional
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from flask_login import UserMixin
 
@@ -21,14 +24,37 @@ class Base(DeclarativeBase):
     })
 db = SQLAlchemy(model_class=Base)
 
+# 设计表格，表格零：店铺（租户），其余各表通过 shop_id 归属到店铺
+# shops：code 店铺编码，name 店铺名称；迁移时创建 id = 1 的默认店铺，原有数据全部归属默认店铺
+class Shops(db.Model):
+    __tablename__ = 'shops'
+    id:Mapped[int] = mapped_column(db.Integer, primary_key=True, autoincrement=True)
+    code:Mapped[str] = mapped_column(db.String(50), nullable=False, unique=True)
+    name:Mapped[str] = mapped_column(db.String(100), nullable=False)
+    created_at:Mapped[datetime] = mapped_column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'code': self.code,
+            'name': self.name
+        }
+
+
 # 设计表格，表格一：用户数据，用于登录，注册，修改，注销等功能的实现对应表格，用于储存用户账号和密码
 # users：Password and Account
 class Users(db.Model, UserMixin):
     __tablename__ = 'users'
     id:Mapped[int] = mapped_column(db.Integer,primary_key = True, autoincrement= True)
-    account:Mapped[str] = mapped_column(db.String(11),nullable=False,unique=True)
+    shop_id:Mapped[int] = mapped_column(db.Integer, db.ForeignKey('shops.id'), nullable=False, default=1, server_default='1')
+    account:Mapped[str] = mapped_column(db.String(11),nullable=False)
     password:Mapped[str] = mapped_column(db.String(200),nullable=False)
 
+    # 同一手机号可以在不同店铺分别注册
+    __table_args__ = (
+        UniqueConstraint('shop_id', 'account', name='uq_users_shop_id_account'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -40,17 +66,27 @@ class Users(db.Model, UserMixin):
 class FruitVariety(db.Model):
     __tablename__ = 'fruit_varieties'
     id:Mapped[int] = mapped_column(db.Integer,primary_key = True, autoincrement= True)
+    shop_id:Mapped[int] = mapped_column(db.Integer, db.ForeignKey('shops.id'), nullable=False, default=1, server_default='1')
     category:Mapped[str] = mapped_column(db.String(100),nullable=False)
     name:Mapped[str] = mapped_column(db.String(100),nullable=False)
+    # 乐观锁版本号，每次 UPDATE 自动 +1，并带上 WHERE version = 旧值
+    version:Mapped[int] = mapped_column(db.Integer, nullable=False, default=1, server_default='1')
 
     # 关联设计
     detail: Mapped["Details"] = relationship("Details", back_populates="variety", uselist=False)
 
+    __mapper_args__ = {'version_id_col': version}
+    # 列表和搜索都按店铺过滤、按 id 排序分页，(shop_id, id) 保证只扫描本店铺的索引区间
+    __table_args__ = (
+        Index('ix_fruit_varieties_shop_id_id', 'shop_id', 'id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
             'category': self.category,
             'name': self.name,
+            'version': self.version,
             'detail': self.detail.to_dict() if self.detail else None    # 把表三的数据主动嵌套进表二的返回结果里
         }
 
@@ -60,14 +96,18 @@ class FruitVariety(db.Model):
 class Details(db.Model):
     __tablename__ = 'details'
     id:Mapped[int] = mapped_column(db.Integer, primary_key=True)
+    shop_id:Mapped[int] = mapped_column(db.Integer, db.ForeignKey('shops.id'), nullable=False, default=1, server_default='1')
     variety_id:Mapped[int] = mapped_column(db.Integer, db.ForeignKey('fruit_varieties.id'), unique=True, nullable=False)
     origin:Mapped[str] = mapped_column(db.String(100))        # 产地
     introduction:Mapped[str] = mapped_column(db.Text)         # 介绍
     price_per_kg:Mapped[float] = mapped_column(db.Float)        # 单价（可选）
     created_at:Mapped[datetime] = mapped_column(db.DateTime, default=datetime.utcnow)
+    version:Mapped[int] = mapped_column(db.Integer, nullable=False, default=1, server_default='1')   # 乐观锁版本号
     # 关联设计
     variety: Mapped["FruitVariety"] = relationship("FruitVariety", back_populates="detail")
 
+    __mapper_args__ = {'version_id_col': version}
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -75,5 +115,74 @@ class Details(db.Model):
             'origin': self.origin,
             'introduction': self.introduction,
             'price_per_kg': self.price_per_kg,
+            'version': self.version,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+
+# 设计表格，表格四：价格历史，只追加不修改，每次单价变化时写入一行
+# price_history：variety_id，price_per_kg 变化后的单价，changed_at 变化时间
+# 不建外键：MySQL 分区表不支持外键，且品种删除后仍需保留历史供分析使用
+# 主键为 (id, changed_at)：MySQL/PostgreSQL 分区表要求分区列出现在主键和所有唯一键中，
+# 这样以后可以直接按 changed_at 做 RANGE 分区，不需要改表结构
+# (shop_id, variety_id, changed_at) 复合索引保证按店铺+品种+时间区间的范围扫描只走索引
+class PriceHistory(db.Model):
+    __tablename__ = 'price_history'
+    id:Mapped[int] = mapped_column(db.BigInteger().with_variant(db.Integer, 'sqlite'), autoincrement=True)
+    shop_id:Mapped[int] = mapped_column(db.Integer, nullable=False, default=1, server_default='1')
+    variety_id:Mapped[int] = mapped_column(db.Integer, nullable=False)
+    price_per_kg:Mapped[Optional[float]] = mapped_column(db.Float)
+    changed_at:Mapped[datetime] = mapped_column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('id', 'changed_at', name='pk_price_history'),
+        Index('ix_price_history_shop_id_variety_id_changed_at', 'shop_id', 'variety_id', 'changed_at'),
+        {'info': {'sqlite_rowid': 'id'}},
+    )
+
+    def to_dict(self):
+        return {
+            'variety_id': self.variety_id,
+            'price_per_kg': self.price_per_kg,
+            'changed_at': self.changed_at.isoformat() if self.changed_at else None
+        }
+
+
+# SQLite 不支持复合主键中的自增列（本地开发和测试使用 SQLite）
+"""
+表的 info 中带 sqlite_rowid 时，SQLite 建表语句把该列写成 INTEGER PRIMARY KEY AUTOINCREMENT（rowid 自增），
+不再单独建复合主键（rowid 本身唯一）；MySQL/PostgreSQL 不受影响，仍是真正的复合主键
+"""
+@compiles(CreateColumn, 'sqlite')
+def _sqlite_rowid_column(element, compiler, **kw):
+    column = element.element
+    if column.table is not None and column.table.info.get('sqlite_rowid') == column.name:
+        return f"{compiler.preparer.format_column(column)} INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT"
+    return compiler.visit_create_column(element, **kw)
+
+
+@compiles(PrimaryKeyConstraint, 'sqlite')
+def _sqlite_rowid_primary_key(element, compiler, **kw):
+    if element.table is not None and element.table.info.get('sqlite_rowid'):
+        return None
+    return compiler.visit_primary_key_constraint(element, **kw)
+
+
+# 设计表格，表格五：审计日志，记录谁在何时修改了哪条果蔬数据
+# audit_logs：shop_id 店铺，table_name 表名，row_id 行主键，action insert/update/delete，
+#             user_id 操作人，changes 修改前后内容(JSON)，created_at
+# 由后台线程批量写入（见 audit.py）；不建外键，用户或品种删除后日志仍保留
+class AuditLog(db.Model):
+    __tablename__ = 'audit_logs'
+    id:Mapped[int] = mapped_column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    shop_id:Mapped[int] = mapped_column(db.Integer, nullable=False, default=1, server_default='1')
+    table_name:Mapped[str] = mapped_column(db.String(50), nullable=False)
+    row_id:Mapped[int] = mapped_column(db.Integer, nullable=False)
+    action:Mapped[str] = mapped_column(db.String(10), nullable=False)
+    user_id:Mapped[int] = mapped_column(db.Integer, nullable=True)
+    changes:Mapped[str] = mapped_column(db.Text, nullable=True)
+    created_at:Mapped[datetime] = mapped_column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_audit_logs_shop_id_table_name_row_id', 'shop_id', 'table_name', 'row_id'),
+    )
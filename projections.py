@@ -0,0 +1,171 @@
+# ==============================================================================
+# 文件名: projections.py
+# 功能: 果蔬只读投影层
+# 描述:
+#   列表、搜索、详情等只读接口不需要完整的 ORM 对象（身份映射、属性追踪、懒加载状态），
+#   这里直接 select 需要的列，一次 LEFT JOIN 取出详情，装进 __slots__ 的只读 dataclass，
+#   to_dict() 与 FruitVariety.to_dict() 返回的结构完全一致
+#   支持 ?fields= 稀疏字段：只 SELECT 请求的列，不需要详情时连 JOIN 都省掉
+#   所有查询都带 shop_id 条件，走 (shop_id, id) 索引，只扫描本店铺的数据
+# ==============================================================================
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, func
+from models import db, FruitVariety, Details
+
+
+FRUIT_FIELDS = ('id', 'category', 'name', 'version')
+DETAIL_FIELDS = ('id', 'variety_id', 'origin', 'introduction', 'price_per_kg', 'version', 'created_at')
+
+
+@dataclass(frozen=True)
+class DetailRow:
+    __slots__ = DETAIL_FIELDS
+    id: int
+    variety_id: int
+    origin: Optional[str]
+    introduction: Optional[str]
+    price_per_kg: Optional[float]
+    version: int
+    created_at: Optional[datetime]
+
+    def to_dict(self, fields:Optional[tuple] = None):
+        data = {
+            'id': self.id,
+            'variety_id': self.variety_id,
+            'origin': self.origin,
+            'introduction': self.introduction,
+            'price_per_kg': self.price_per_kg,
+            'version': self.version,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+        if fields is None:
+            return data
+        return {k: data[k] for k in fields}
+
+
+@dataclass(frozen=True)
+class FruitRow:
+    __slots__ = ('id', 'category', 'name', 'version', 'detail')
+    id: int
+    category: str
+    name: str
+    version: int
+    detail: Optional[DetailRow]
+
+    def to_dict(self, fields:Optional['FieldSet'] = None):
+        if fields is None:
+            return {
+                'id': self.id,
+                'category': self.category,
+                'name': self.name,
+                'version': self.version,
+                'detail': self.detail.to_dict() if self.detail else None
+            }
+        data = {k: getattr(self, k) for k in fields.fruit}
+        if fields.detail is not None:
+            data['detail'] = self.detail.to_dict(fields.detail) if self.detail else None
+        return data
+
+
+# 稀疏字段集
+"""
+?fields=id,name,category,detail.price_per_kg
+fruit：要返回的品种字段；detail：要返回的详情字段，None 表示不返回 detail
+写 detail 表示返回全部详情字段
+"""
+@dataclass(frozen=True)
+class FieldSet:
+    __slots__ = ('fruit', 'detail')
+    fruit: tuple
+    detail: Optional[tuple]
+
+
+# 解析 fields 参数，含未知字段时抛出 ValueError
+def parse_fields(spec:Optional[str])->Optional[FieldSet]:
+    if not spec or not spec.strip():
+        return None
+    fruit, detail = [], None
+    for name in (part.strip() for part in spec.split(',')):
+        if not name:
+            continue
+        if name == 'detail':
+            detail = DETAIL_FIELDS
+        elif name.startswith('detail.'):
+            key = name[len('detail.'):]
+            if key not in DETAIL_FIELDS:
+                raise ValueError(name)
+            if detail is None:
+                detail = ()
+            if detail is not DETAIL_FIELDS and key not in detail:
+                detail = detail + (key,)
+        elif name in FRUIT_FIELDS:
+            if name not in fruit:
+                fruit.append(name)
+        else:
+            raise ValueError(name)
+    return FieldSet(tuple(fruit), detail)
+
+
+# 品种表 LEFT JOIN 详情表，只取投影需要的列
+"""
+详情列统一加 d_ 前缀；只要涉及详情就额外带上 d_id，用来区分"没有详情"和"字段为空"
+fields 中不含详情字段时不做 JOIN
+"""
+def select_fruits(fields:Optional[FieldSet] = None):
+    fruit_keys = FRUIT_FIELDS if fields is None else fields.fruit
+    detail_keys = DETAIL_FIELDS if fields is None else fields.detail
+    columns = [getattr(FruitVariety, k) for k in fruit_keys]
+    if detail_keys is not None:
+        columns += [getattr(Details, k).label(f'd_{k}') for k in dict.fromkeys(('id',) + detail_keys)]
+    if not columns:
+        columns = [FruitVariety.id]
+    stmt = select(*columns).select_from(FruitVariety)
+    if detail_keys is not None:
+        stmt = stmt.outerjoin(Details, Details.variety_id == FruitVariety.id)
+    return stmt
+
+
+def to_fruit_row(row)->FruitRow:
+    values = row._mapping
+    detail = None
+    if values.get('d_id') is not None:
+        detail = DetailRow(*(values.get(f'd_{k}') for k in DETAIL_FIELDS))
+    return FruitRow(*(values.get(k) for k in FRUIT_FIELDS), detail)
+
+
+# 单个品种，不存在或不属于该店铺时返回 None
+def get_fruit(shop_id:int, fruit_id:int)->Optional[FruitRow]:
+    row = db.session.execute(
+        select_fruits().where(FruitVariety.shop_id == shop_id, FruitVariety.id == fruit_id)
+    ).first()
+    return to_fruit_row(row) if row else None
+
+
+# 分页查询
+"""
+shop_id 为店铺；where 为品种表上的其他过滤条件（如搜索），COUNT 只扫品种表，不做 JOIN
+fields 为稀疏字段集，None 表示全部字段
+返回 (当前页的 FruitRow 列表, 分页信息)，分页信息字段与原 paginate() 返回一致
+"""
+def paginate_fruits(shop_id:int, page:int, per_page:int, where=None, fields:Optional[FieldSet] = None):
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+    count_stmt = select(func.count()).select_from(FruitVariety).where(FruitVariety.shop_id == shop_id)
+    stmt = select_fruits(fields).where(FruitVariety.shop_id == shop_id)
+    if where is not None:
+        count_stmt = count_stmt.where(where)
+        stmt = stmt.where(where)
+    total = db.session.scalar(count_stmt)
+    rows = db.session.execute(
+        stmt.order_by(FruitVariety.id).limit(per_page).offset((page - 1) * per_page)
+    ).all()
+    pages = (total + per_page - 1) // per_page
+    return [to_fruit_row(r) for r in rows], {
+        'total': total,
+        'pages': pages,
+        'has_next': page < pages,
+        'has_prev': page > 1
+    }
@@ -0,0 +1,160 @@
+# ==============================================================================
+# 文件名: seed.py
+# 功能: 合成数据生成（压测/基准测试用）
+# 描述:
+#   1. seed_catalog：生成果蔬品种 + 详情 + 初始价格历史，中文大类/品种名/产地/介绍
+#   2. seed_users：生成 11 位手机号账号，所有用户共用一个预先计算好的密码哈希
+#      （逐个 generate_password_hash 生成 10 万用户需要数小时）
+#   3. 按 batch_size 分批 Core executemany 插入，每批一个事务，边生成边写入，内存有界；
+#      Core 插入不经过 ORM 会话事件，不产生审计日志
+#   4. 使用 random.Random(seed)，相同参数生成相同的数据，可重复对比
+#   5. 命令行：flask --app app seed --varieties 1000000 --users 100000
+#   基准脚本可直接调用 seed_catalog / seed_users（需在应用上下文中）
+# ==============================================================================
+
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select, func, text
+from werkzeug.security import generate_password_hash
+from datetime import datetime, timedelta
+import random
+import click
+from models import db, Shops, Users, FruitVariety, Details, PriceHistory
+
+SEED_PASSWORD = 'Seed1234'     # 合成用户的统一密码，满足 validate_password
+SEED_ACCOUNT_PREFIX = '199'    # 合成用户手机号段，与真实注册用户区分
+
+CATALOG = {
+    '苹果': ['富士', '红星', '嘎啦', '国光', '黄元帅', '蛇果', '冰糖心', '秦冠'],
+    '梨': ['鸭梨', '雪花梨', '香梨', '砀山酥梨', '南果梨', '皇冠梨', '丰水梨'],
+    '桃': ['水蜜桃', '黄桃', '油桃', '蟠桃', '毛桃', '白凤桃'],
+    '葡萄': ['巨峰', '夏黑', '阳光玫瑰', '红提', '美人指', '无核白'],
+    '柑橘': ['砂糖橘', '沃柑', '脐橙', '丑橘', '贡柑', '皇帝柑', '金桔'],
+    '瓜类': ['西瓜', '哈密瓜', '甜瓜', '香瓜', '羊角蜜'],
+    '浆果': ['草莓', '蓝莓', '树莓', '桑葚', '蔓越莓'],
+    '热带水果': ['芒果', '菠萝', '香蕉', '火龙果', '榴莲', '山竹', '椰子', '荔枝', '龙眼'],
+    '核果': ['樱桃', '车厘子', '杏', '李子', '枣', '杨梅'],
+    '叶菜': ['大白菜', '菠菜', '生菜', '油麦菜', '小白菜', '芹菜', '空心菜'],
+    '根茎': ['土豆', '胡萝卜', '白萝卜', '红薯', '山药', '莲藕', '芋头'],
+    '茄果': ['番茄', '茄子', '青椒', '黄瓜', '南瓜', '丝瓜', '苦瓜'],
+}
+NAME_PREFIXES = ['', '', '红', '金', '蜜', '脆', '雪', '翠', '紫', '有机', '精品', '高山']
+ORIGINS = [
+    '山东烟台', '陕西洛川', '新疆阿克苏', '河北赵县', '安徽砀山', '辽宁鞍山', '云南昆明', '海南三亚',
+    '广西百色', '广东湛江', '四川蒲江', '浙江黄岩', '江西赣州', '福建漳州', '甘肃天水', '山西运城',
+    '宁夏中卫', '吉林白山', '湖北秭归', '湖南麻阳', '重庆奉节', '贵州修文', '河南灵宝', '江苏无锡',
+]
+INTRO_PHRASES = [
+    '果肉脆甜多汁', '口感细腻', '香气浓郁', '酸甜适中', '皮薄肉厚', '汁水充足', '当季现摘',
+    '产地直发', '个头均匀', '耐储存', '适合榨汁', '老少皆宜', '富含维生素C', '无农药残留检测合格',
+]
+
+
+def _progress(label:str, done:int, total:int):
+    click.echo(f"  {label}: {done}/{total} ({done * 100 // max(total, 1)}%)")
+
+
+def _ensure_shop(shop_id:int):
+    if db.session.get(Shops, shop_id) is None:
+        db.session.add(Shops(id=shop_id, code='default' if shop_id == 1 else f'shop-{shop_id}', name=f'店铺{shop_id}'))
+        db.session.commit()
+
+
+# 生成果蔬目录
+"""
+品种 id 显式指定为现有最大 id 之后的连续区间，这样详情和价格历史不需要回查 id
+返回写入的品种数；progress(done, total) 为每批完成后的回调
+"""
+def seed_catalog(varieties:int, shop_id:int = 1, seed:int = 42, batch_size:int = 5000, progress=None)->int:
+    _ensure_shop(shop_id)
+    rng = random.Random(seed)
+    categories = list(CATALOG)
+    start_id = (db.session.scalar(select(func.max(FruitVariety.id))) or 0) + 1
+    now = datetime.utcnow()
+
+    done = 0
+    while done < varieties:
+        size = min(batch_size, varieties - done)
+        fruits, details, history = [], [], []
+        for fruit_id in range(start_id + done, start_id + done + size):
+            category = rng.choice(categories)
+            name = f"{rng.choice(NAME_PREFIXES)}{rng.choice(CATALOG[category])}{rng.randint(1, 99)}号"
+            price = round(rng.lognormvariate(2.3, 0.6), 2)
+            created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            fruits.append({'id': fruit_id, 'shop_id': shop_id, 'category': category, 'name': name})
+            details.append({
+                'shop_id': shop_id,
+                'variety_id': fruit_id,
+                'origin': rng.choice(ORIGINS),
+                'introduction': '，'.join(rng.sample(INTRO_PHRASES, rng.randint(2, 5))) + '。',
+                'price_per_kg': price,
+                'created_at': created_at
+            })
+            history.append({'shop_id': shop_id, 'variety_id': fruit_id, 'price_per_kg': price, 'changed_at': created_at})
+        db.session.execute(insert(FruitVariety.__table__), fruits)
+        db.session.execute(insert(Details.__table__), details)
+        db.session.execute(insert(PriceHistory.__table__), history)
+        db.session.commit()
+        done += size
+        if progress:
+            progress(done, varieties)
+
+    # PostgreSQL 显式写入 id 不会推进序列，需要手动同步
+    if varieties and db.engine.dialect.name == 'postgresql':
+        db.session.execute(text(
+            "SELECT setval(pg_get_serial_sequence('fruit_varieties', 'id'), (SELECT MAX(id) FROM fruit_varieties))"))
+        db.session.commit()
+    return varieties
+
+
+# 生成用户
+"""
+账号为 199 号段 + 8 位序号，从该店铺已有的最大 199 号段账号之后继续编号，
+中间的账号被删除或号段内有真实注册用户时重复执行也不会冲突
+所有用户的密码都是 SEED_PASSWORD
+"""
+def seed_users(count:int, shop_id:int = 1, batch_size:int = 5000, progress=None)->int:
+    _ensure_shop(shop_id)
+    password_hash = generate_password_hash(SEED_PASSWORD)
+    # 账号定长，字符串最大值即序号最大值
+    last = db.session.scalar(
+        select(func.max(Users.account))
+        .where(Users.shop_id == shop_id, Users.account.like(f'{SEED_ACCOUNT_PREFIX}{"_" * 8}'))
+    )
+    start = int(last[len(SEED_ACCOUNT_PREFIX):]) + 1 if last else 0
+    if start + count > 10 ** 8:
+        raise ValueError('合成账号号段已用完')
+
+    done = 0
+    while done < count:
+        size = min(batch_size, count - done)
+        db.session.execute(insert(Users.__table__), [
+            {'shop_id': shop_id, 'account': f'{SEED_ACCOUNT_PREFIX}{n:08d}', 'password': password_hash}
+            for n in range(start + done, start + done + size)
+        ])
+        db.session.commit()
+        done += size
+        if progress:
+            progress(done, count)
+    return count
+
+
+@click.command('seed')
+@click.option('--varieties', default=1000, show_default=True, help='生成的品种数')
+@click.option('--users', default=100, show_default=True, help='生成的用户数')
+@click.option('--shop', 'shop_id', default=None, type=int, help='写入的店铺，默认 DEFAULT_SHOP_ID')
+@click.option('--seed', default=42, show_default=True, help='随机种子，相同种子生成相同数据')
+@click.option('--batch-size', default=5000, show_default=True, help='每批插入条数')
+@with_appcontext
+def seed_command(varieties, users, shop_id, seed, batch_size):
+    """生成合成数据（果蔬目录和用户），用于压测和基准测试"""
+    if shop_id is None:
+        shop_id = current_app.config['DEFAULT_SHOP_ID']
+    started = datetime.utcnow()
+    if varieties:
+        click.echo(f"写入 {varieties} 个品种（店铺 {shop_id}，seed={seed}）")
+        seed_catalog(varieties, shop_id, seed, batch_size, lambda d, t: _progress('品种', d, t))
+    if users:
+        click.echo(f"写入 {users} 个用户，统一密码 {SEED_PASSWORD}")
+        seed_users(users, shop_id, batch_size, lambda d, t: _progress('用户', d, t))
+    click.echo(f"✅ 完成，用时 {(datetime.utcnow() - started).total_seconds():.1f} 秒")
@@ -0,0 +1,180 @@
+# ==============================================================================
+# 文件名: slow_queries.py
+# 功能: 慢查询日志
+# 描述:
+#   1. 在数据库引擎上注册 before/after_cursor_execute 事件，统计每条 SQL 的耗时
+#   2. 超过阈值的语句按“形状”聚合：字面量、占位符统一替换为 ?，IN (?, ?, ...) 折叠为 IN (...)，
+#      同一形状只保留一条记录（次数、总耗时、最大耗时、最近一次的参数和调用接口）
+#   3. SELECT 语句首次变慢时自动执行一次 EXPLAIN（SQLite 为 EXPLAIN QUERY PLAN）保存执行计划；
+#      EXPLAIN 直接用底层 DBAPI 游标执行，不经过 SQLAlchemy，不会再次触发本模块的事件
+#   4. 记录存放在有上限的 OrderedDict 中，超出时淘汰最久未出现的形状，内存有界
+#   记录只保存在当前进程内，多 worker 部署时每个 worker 各自统计
+#   查看：GET /api/admin/slow-queries（见 admin_routes.py）
+# 配置:
+#   SLOW_QUERY_THRESHOLD_MS  阈值（毫秒），默认 0 表示关闭，关闭时不注册任何事件
+#   SLOW_QUERY_BUFFER_SIZE   最多保留的语句形状数，默认 200
+#   SLOW_QUERY_EXPLAIN       是否自动采集执行计划，默认 True
+# ==============================================================================
+
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+import re
+import threading
+import time
+from models import db
+
+MAX_PARAMS_LENGTH = 500        # 参数 repr 的最大长度
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'mysql': 'EXPLAIN ',
+    'mariadb': 'EXPLAIN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|\$\d+|(?<!:):\w+')
+_IN_LIST = re.compile(r'\bIN \(\?(?:, \?)*\)', re.IGNORECASE)
+_VALUES_ROWS = re.compile(r'\(\?(?:, \?)*\)(?:, \(\?(?:, \?)*\))+')
+_SPACES = re.compile(r'\s+')
+
+
+# 语句形状：去掉所有可变部分，只保留结构
+def normalize_statement(statement:str)->str:
+    shape = _STRING.sub('?', statement)
+    shape = _PLACEHOLDER.sub('?', shape)
+    shape = _NUMBER.sub('?', shape)
+    shape = _SPACES.sub(' ', shape).strip()
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _VALUES_ROWS.sub('(...)', shape)
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms:float, max_size:int, explain:bool):
+        self.threshold_ms = threshold_ms
+        self.max_size = max_size
+        self.explain = explain
+        self._entries = OrderedDict()   # 语句形状 -> 统计信息
+        self._lock = threading.Lock()
+
+    def attach(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    # 开始时间存在本次执行的 context 上，语句出错时随 context 一起丢弃，不会残留在连接上
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_start = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_slow_query_start', None)
+        if start is None:
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+        shape = normalize_statement(statement)
+        need_plan = self.record(shape, elapsed_ms, parameters, executemany)
+        if need_plan:
+            plan = self._explain(conn.dialect.name, cursor, statement, parameters)
+            with self._lock:
+                entry = self._entries.get(shape)
+                if entry is not None:
+                    entry['plan'] = plan
+
+    # 登记一次慢查询，返回是否需要采集执行计划
+    def record(self, shape:str, elapsed_ms:float, parameters, executemany:bool)->bool:
+        endpoint = f"{request.method} {request.path}" if has_request_context() else None
+        params = '<executemany>' if executemany else _format_params(shape, parameters)
+        with self._lock:
+            entry = self._entries.get(shape)
+            if entry is None:
+                entry = self._entries[shape] = {
+                    'statement': shape,
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'plan': None
+                }
+            self._entries.move_to_end(shape)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['last_ms'] = elapsed_ms
+            entry['last_params'] = params
+            entry['last_endpoint'] = endpoint
+            entry['last_seen'] = datetime.utcnow()
+            need_plan = (self.explain and entry['plan'] is None and not executemany
+                         and shape.upper().startswith('SELECT'))
+            if need_plan:
+                entry['plan'] = []   # 占位，其他线程不再重复 EXPLAIN
+            return need_plan
+
+    # 用同一连接的新游标执行 EXPLAIN，参数与原语句相同；失败时返回错误信息
+    def _explain(self, dialect:str, cursor, statement:str, parameters)->list:
+        prefix = EXPLAIN_PREFIXES.get(dialect)
+        if prefix is None:
+            return [f'不支持 {dialect} 的 EXPLAIN']
+        explain_cursor = None
+        try:
+            explain_cursor = cursor.connection.cursor()
+            explain_cursor.execute(prefix + statement, parameters)
+            return [' | '.join(str(col) for col in row) for row in explain_cursor.fetchall()]
+        except Exception as e:
+            return [f'EXPLAIN 失败: {e}']
+        finally:
+            if explain_cursor is not None:
+                explain_cursor.close()
+
+    # 按 sort 字段倒序返回前 limit 条
+    def snapshot(self, sort:str = 'max_ms', limit:int = 50)->list:
+        with self._lock:
+            entries = [dict(e) for e in self._entries.values()]
+        entries.sort(key=lambda e: e[sort], reverse=True)
+        result = []
+        for e in entries[:limit]:
+            e['avg_ms'] = round(e['total_ms'] / e['count'], 2)
+            e['total_ms'] = round(e['total_ms'], 2)
+            e['max_ms'] = round(e['max_ms'], 2)
+            e['last_ms'] = round(e['last_ms'], 2)
+            e['last_seen'] = e['last_seen'].isoformat()
+            result.append(e)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 参数转成字符串保存；涉及密码的语句不保存参数
+def _format_params(shape:str, parameters)->str:
+    if 'password' in shape.lower():
+        return '<hidden>'
+    text = repr(parameters)
+    if len(text) > MAX_PARAMS_LENGTH:
+        text = text[:MAX_PARAMS_LENGTH] + '...'
+    return text
+
+
+def init_slow_query_log(app):
+    app.config.setdefault('SLOW_QUERY_THRESHOLD_MS', 0)
+    app.config.setdefault('SLOW_QUERY_BUFFER_SIZE', 200)
+    app.config.setdefault('SLOW_QUERY_EXPLAIN', True)
+    if not app.config['SLOW_QUERY_THRESHOLD_MS']:
+        return
+    log = SlowQueryLog(
+        app.config['SLOW_QUERY_THRESHOLD_MS'],
+        app.config['SLOW_QUERY_BUFFER_SIZE'],
+        app.config['SLOW_QUERY_EXPLAIN']
+    )
+    with app.app_context():
+        log.attach(db.engine)   # 只创建引擎对象，不会建立连接
+    app.extensions['slow_queries'] = log
+
+
+def get_slow_query_log():
+    return current_app.extensions.get('slow_queries')
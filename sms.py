@@ -10,11 +10,14 @@
 # ==============================================================================
 
 # 模块导入
-from redis import Redis
+from typing import TYPE_CHECKING
 import random
 import time
 import re
 
+if TYPE_CHECKING:   # 仅用于类型标注，运行时不导入 redis，加快启动
+    from redis import Redis
+
 # 函数设计
 # 随机数字生成函数——6位
 def random_num():
@@ -28,7 +31,7 @@ redis记录发送时间和过期时间
 redis防刷限制
 模拟打印
 """
-def send_sms_code(phone:str, redis_client:Redis,debug_mode:bool = True)->dict:
+def send_sms_code(phone:str, redis_client:'Redis',debug_mode:bool = True)->dict:
     #验证手机号格式
     if not phone or len(phone) != 11 or not phone.isdigit():
         return {'success': False, 'message': '手机号格式不正确'}
@@ -123,7 +126,7 @@ def send_sms_code(phone:str, redis_client:Redis,debug_mode:bool = True)->dict:
 成功返回状态并销毁验证码
 失败返回状态并销毁验证码
 """
-def verify_sms_code(phone:str,input_code,redis_client:Redis):
+def verify_sms_code(phone:str,input_code,redis_client:'Redis'):
     #验证手机号格式
     if not phone or len(phone) != 11 or not phone.isdigit():
         return {'success': False, 'message': '手机号格式不正确'}
@@ -0,0 +1,62 @@
+# ==============================================================================
+# 文件名: sms_routes.py
+# 功能: 短信验证码蓝图
+# 描述: 发送与校验验证码的接口，具体逻辑见 sms.py
+# ==============================================================================
+
+from flask import Blueprint, request, g, current_app
+from extensions import get_redis
+from sms import verify_sms_code, send_sms_code
+from utils import success, error
+
+sms_bp = Blueprint('sms', __name__)
+
+# 验证码发送功能   
+@sms_bp.route('/api/sms/send', methods = ['POST'])
+def send_sms():
+    if not g.current_user or not  hasattr(g, 'current_user'):
+        return error(message='请先登录', code=401)
+    current_phone = g.current_user.account
+
+    # 验证码必须存入 Redis 才能校验，降级期间不发送
+    redis_client = get_redis()
+    if redis_client is None:
+        return error('短信服务暂不可用，请稍后重试', 503)
+    debug_mode = current_app.config['DEBUG']
+    result = send_sms_code(phone=current_phone, redis_client=redis_client, debug_mode=debug_mode)
+    if result['success']:
+        return success(data={'debug_code': result.get('debug_code')}, message=result['message'])
+    else:
+        # 失败则返回对应的错误码（如 400 或 500）
+        # 这里简单处理，统一返回 400，你也可以根据具体 message 区分
+        return error(result['message'], 400)
+
+# 验证码检查功能
+@sms_bp.route('/api/sms/verify', methods=['POST'])
+def verify_sms():
+    if not hasattr(g, 'current_user') or not g.current_user:
+        return error(message='请先登录', code=401)
+    """
+    校验短信验证码接口
+    通常用于注册、找回密码等场景
+    """
+    data = request.get_json()
+    if not data:
+        return error('请求数据不能为空', 400)
+        
+    phone = g.current_user.account
+    code = data.get('code')
+    
+    if not code:
+        return error('验证码不能为空', 400)
+
+    redis_client = get_redis()
+    if redis_client is None:
+        return error('短信服务暂不可用，请稍后重试', 503)
+    # 调用 sms.py 中的校验逻辑
+    result = verify_sms_code(phone=phone, input_code=code, redis_client=redis_client)
+    
+    if result['success']:
+        return success(message=result['message'])
+    else:
+        return error(result['message'], 400)
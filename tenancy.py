@@ -0,0 +1,60 @@
+# ==============================================================================
+# 文件名: tenancy.py
+# 功能: 多店铺（租户）解析
+# 描述:
+#   一套部署服务多个店铺，果蔬、用户、价格历史、审计日志都带 shop_id
+#   1. before_request 钩子按请求头 X-Shop-Id 解析当前店铺，写入 g.shop_id；
+#      不带请求头时使用 DEFAULT_SHOP_ID（默认店铺，迁移时创建，id 为 1）
+#   2. 店铺是否存在的检查结果在进程内缓存 SHOP_CACHE_TTL 秒，不会每个请求都查库
+#   3. 所有查询、缓存 key、会话 key、变更流都按 g.shop_id 隔离
+#   该钩子在 create_app 中先于蓝图注册，保证 Token 校验等钩子执行时 g.shop_id 已就绪
+# ==============================================================================
+
+from flask import request, g, has_request_context, current_app
+import time
+from models import db, Shops
+from utils import error
+
+SHOP_HEADER = 'X-Shop-Id'
+SHOP_CACHE_TTL = 60     # 店铺存在性缓存秒数
+
+_known_shops = {}    # shop_id -> 过期时间
+
+
+def _shop_exists(shop_id:int)->bool:
+    expires = _known_shops.get(shop_id)
+    if expires is not None and expires > time.monotonic():
+        return True
+    if db.session.get(Shops, shop_id) is None:
+        return False
+    _known_shops[shop_id] = time.monotonic() + SHOP_CACHE_TTL
+    return True
+
+
+# 全局钩子：解析当前请求所属店铺
+def resolve_shop():
+    default_shop = current_app.config['DEFAULT_SHOP_ID']
+    header = request.headers.get(SHOP_HEADER)
+    if not header:
+        g.shop_id = default_shop
+        return None
+    try:
+        shop_id = int(header)
+    except ValueError:
+        return error(f'{SHOP_HEADER} 格式错误', 400)
+    if shop_id != default_shop and not _shop_exists(shop_id):
+        return error('店铺不存在', 404)
+    g.shop_id = shop_id
+    return None
+
+
+# 当前店铺；请求之外（命令行、后台线程）返回默认店铺
+def current_shop_id()->int:
+    if has_request_context() and 'shop_id' in g:
+        return g.shop_id
+    return current_app.config['DEFAULT_SHOP_ID']
+
+
+def init_tenancy(app):
+    app.config.setdefault('DEFAULT_SHOP_ID', 1)
+    app.before_request(resolve_shop)
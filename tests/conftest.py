@@ -0,0 +1,72 @@
+# ==============================================================================
+# 文件名: tests/conftest.py
+# 功能: 测试夹具
+# 描述:
+#   每个测试一个独立的应用：SQLite 临时文件数据库 + fakeredis 替身
+#   fake_redis_server.connected = False 即模拟 Redis 宕机，置回 True 即恢复
+#   运行：pip install pytest fakeredis && python -m pytest -q
+# ==============================================================================
+
+import os
+import sys
+import fakeredis
+import pytest
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from extensions import RedisState
+import login_guard
+from models import db, Shops, Users, FruitVariety, Details
+
+TEST_ACCOUNT = '13800138000'
+TEST_PASSWORD = 'Test1234'
+
+
+@pytest.fixture
+def fake_redis_server():
+    server = fakeredis.FakeServer()
+    yield server
+    server.connected = True   # 让仍在重试的后台线程退出
+
+
+@pytest.fixture
+def app(tmp_path, fake_redis_server, monkeypatch):
+    # 不启动后台重连线程，由测试直接调用 RedisState._reconnect
+    monkeypatch.setattr(RedisState, 'ensure_monitor', lambda self: None)
+    # 进程内的登录失败计数每个测试独立
+    monkeypatch.setattr(login_guard, '_local_counter', login_guard.LocalFailureCounter(login_guard.LOCAL_MAX_KEYS))
+    app = create_app({
+        'TESTING': True,
+        'SECRET_KEY': 'test-secret',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'REDIS_RETRY_INTERVAL': 0,
+    })
+    app.extensions['redis'] = fakeredis.FakeRedis(server=fake_redis_server, decode_responses=True)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Shops(id=1, code='default', name='默认店铺'))
+        db.session.add(Users(id=1, shop_id=1, account=TEST_ACCOUNT, password=generate_password_hash(TEST_PASSWORD)))
+        db.session.add(FruitVariety(id=1, shop_id=1, category='苹果', name='富士'))
+        db.session.add(Details(shop_id=1, variety_id=1, origin='山东烟台', introduction='脆甜', price_per_kg=10))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client)->str:
+    response = client.post('/api/login', json={'account': TEST_ACCOUNT, 'password': TEST_PASSWORD})
+    assert response.status_code == 200
+    return response.get_json()['data']['token']
+
+
+def auth(token:str)->dict:
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,110 @@
+# ==============================================================================
+# 文件名: tests/test_degraded_mode.py
+# 功能: Redis 不可用时的降级行为
+# 描述:
+#   公开读接口照常可用；登录改发签名 Token（s. 前缀）且可访问需登录接口；
+#   Redis 中保存的旧 Token、短信验证码、变更流返回 503；登录失败次数改用进程内计数，仍会锁定；
+#   Redis 恢复后 RedisState._reconnect 退出降级模式、清空降级期间可能陈旧的详情缓存，
+#   并为降级期间未能发布的变更写入缺口标记
+# ==============================================================================
+
+from extensions import get_redis, get_redis_state
+from auth_routes import SIGNED_TOKEN_PREFIX
+from conftest import login, auth, TEST_ACCOUNT
+from login_guard import ACCOUNT_FREE_ATTEMPTS
+
+
+def test_public_reads_without_redis(client, fake_redis_server):
+    fake_redis_server.connected = False
+    assert client.get('/api/fruits').status_code == 200
+    response = client.get('/api/search', query_string={'q': '富士'})
+    assert response.status_code == 200
+
+
+def test_login_issues_signed_token_without_redis(client, fake_redis_server):
+    fake_redis_server.connected = False
+    token = login(client)
+    assert token.startswith(SIGNED_TOKEN_PREFIX)
+
+    response = client.get('/api/fruits/1', headers=auth(token))
+    assert response.status_code == 200
+    assert response.get_json()['data']['name'] == '富士'
+
+    response = client.patch('/api/fruits/1', json={'name': '红富士'}, headers=auth(token))
+    assert response.status_code == 200
+    assert client.get('/api/fruits/1', headers=auth(token)).get_json()['data']['name'] == '红富士'
+
+
+def test_redis_session_token_returns_503(client, fake_redis_server):
+    token = login(client)
+    assert not token.startswith(SIGNED_TOKEN_PREFIX)
+
+    fake_redis_server.connected = False
+    assert client.get('/api/fruits/1', headers=auth(token)).status_code == 503
+    # 已进入降级模式，后续请求不再访问 Redis
+    assert client.get('/api/fruits/1', headers=auth(token)).status_code == 503
+
+
+def test_sms_and_change_feed_return_503(client, fake_redis_server):
+    fake_redis_server.connected = False
+    token = login(client)
+
+    assert client.post('/api/sms/send', headers=auth(token)).status_code == 503
+    assert client.post('/api/sms/verify', json={'code': '123456'}, headers=auth(token)).status_code == 503
+    assert client.get('/api/fruits/changes', query_string={'since': '0'}).status_code == 503
+
+
+def test_login_attempts_limited_without_redis(client, fake_redis_server):
+    fake_redis_server.connected = False
+    for _ in range(ACCOUNT_FREE_ATTEMPTS):
+        response = client.post('/api/login', json={'account': TEST_ACCOUNT, 'password': 'Wrong1234'})
+        assert response.status_code == 401
+    response = client.post('/api/login', json={'account': TEST_ACCOUNT, 'password': 'Wrong1234'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_reconnect_restores_service_and_purges_cache(app, client, fake_redis_server):
+    token = login(client)
+    assert client.get('/api/fruits/1', headers=auth(token)).status_code == 200
+    redis_client = app.extensions['redis']
+    assert redis_client.keys('fruit:detail:*')
+
+    fake_redis_server.connected = False
+    assert client.get('/api/fruits/1', headers=auth(token)).status_code == 503
+    with app.app_context():
+        state = get_redis_state()
+        assert not state.available
+        assert get_redis() is None
+
+    fake_redis_server.connected = True
+    state._reconnect()
+    assert state.available
+    assert redis_client.keys('fruit:detail:*') == []
+    with app.app_context():
+        assert get_redis() is not None
+    assert client.get('/api/fruits/1', headers=auth(token)).status_code == 200
+
+
+def test_changes_during_outage_are_reported_as_gap(app, client, fake_redis_server):
+    token = login(client)
+    assert client.patch('/api/fruits/1', json={'detail': {'price_per_kg': 11}}, headers=auth(token)).status_code == 200
+    before_outage = client.get('/api/fruits/changes', query_string={'since': '0'}).get_json()['data']['last_seq']
+
+    fake_redis_server.connected = False
+    signed = login(client)
+    assert signed.startswith(SIGNED_TOKEN_PREFIX)
+    assert client.patch('/api/fruits/1', json={'detail': {'price_per_kg': 12}}, headers=auth(signed)).status_code == 200
+
+    fake_redis_server.connected = True
+    with app.app_context():
+        state = get_redis_state()
+    state._reconnect()
+
+    data = client.get('/api/fruits/changes', query_string={'since': before_outage}).get_json()['data']
+    assert data['truncated'] is True
+    assert data['changes'] == []
+    # 从缺口之后续传的客户端不再收到 truncated
+    gap_seq = app.extensions['redis'].xrevrange('fruit_changes:1', count=1)[0][0]
+    data = client.get('/api/fruits/changes', query_string={'since': gap_seq}).get_json()['data']
+    assert data['truncated'] is False
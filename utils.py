@@ -0,0 +1,49 @@
+# ==============================================================================
+# 文件名: utils.py
+# 功能: 通用工具函数
+# 描述:
+#   1. 统一的 success/error 响应格式
+#   2. 密码强度校验
+#   3. 从请求头中提取会话 Token
+# ==============================================================================
+
+from flask import jsonify, request
+import re
+
+# 工具函数
+def success(data = None, message = "Success"):
+    return jsonify({
+        'code':200 , # 成功
+        'message' :message,
+        'data': data
+    })
+
+def error(message = 'Error', code = 400):
+    return jsonify({
+        'code':code,
+        'message':message
+    }),code
+
+# 密码验证函数设计
+"""
+数字、大写字母、小写字母的混合,而且字符数要等于8个
+新增一个验证函数validate_password
+"""
+def validate_password(password:str)->bool:
+    if not re.search(r'\d', password):
+        return False
+    if not re.search(r'[a-z]', password):
+        return False
+    if not re.search(r'[A-Z]', password):
+        return False
+    if len(password) != 8:
+        return False
+    return True
+
+
+# 从请求头中取出会话 Token，兼容 Authorization: Bearer 和自定义 X-Session-Token
+def get_request_token():
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith("Bearer "):
+        return auth_header.split(" ")[1]
+    return request.headers.get('X-Session-Token')